@@ -1,51 +1,25 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-
-DB_PATH = "candidates.db"
-
-def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+from sqlalchemy import select
+from repository import candidates, create_schema, execute, read_connection, write
+import candidate_store
+from candidate_store import insert_candidates, to_candidate_row
 
 def create_table():
-    with get_connection() as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS candidates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                skills TEXT,
-                education TEXT,
-                certifications TEXT,
-                experience TEXT,
-                email TEXT,
-                phone_number TEXT,
-                linkedin TEXT,
-                score REAL,
-                status TEXT
-            )
-        """)
-        conn.commit()
+    # Tables and indexes are owned by the migrations module (or created from repository.py on a server database)
+    create_schema()
 
 def insert_candidate(name, skills, education, certifications, experience, email, phone_number, linkedin, score, status):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO candidates (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)
-    )
-    conn.commit()
-    conn.close()
+    write(insert_candidates, [(name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)])
 
 def fetch_candidates():
-    with get_connection() as conn:
-        return conn.execute("SELECT * FROM candidates").fetchall()
+    with read_connection() as conn:
+        return candidate_store.fetch_candidates(conn)
 
 def print_candidates_table():
-    conn = sqlite3.connect('candidates.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM candidates")
-    rows = cursor.fetchall()
-    columns = [description[0] for description in cursor.description]
+    with read_connection() as conn:
+        rows = execute(conn, select(candidates)).fetchall()
+    columns = [column.name for column in candidates.columns]
     st.write("\nCandidates Table:")
     st.write("-" * 80)
     st.write("\t".join(columns))
@@ -53,7 +27,6 @@ def print_candidates_table():
     for row in rows:
         st.write("\t".join(str(item) for item in row))
     st.write("-" * 80)
-    conn.close()
 
 # Ensure the table exists
 create_table()
@@ -80,19 +53,7 @@ with tab1:
     ])
     # Button to save results to DB
     if st.button("Save Interview Results to Database"):
-        for _, row in interview_results.iterrows():
-            insert_candidate(
-                row.get('name', ''),
-                row.get('skills', ''),
-                row.get('education', ''),
-                row.get('certifications', ''),
-                row.get('experience', ''),
-                row.get('email', ''),
-                row.get('phone_number', ''),
-                row.get('linkedin', ''),
-                row.get('score', 0),
-                row.get('status', '')
-            )
+        write(insert_candidates, [to_candidate_row(record) for record in interview_results.to_dict('records')])
         st.success("Interview results saved to database!")
 
 with tab2:
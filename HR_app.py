@@ -7,8 +7,6 @@ from dotenv import load_dotenv
 import re
 import json
 from datetime import datetime
-from pdfminer.high_level import extract_text
-import docx  # python-docx
 from openai import OpenAI
 from twilio.rest import Client
 import requests
@@ -17,14 +15,26 @@ from email.mime.text import MIMEText
 import time
 import io
 import yagmail
-import sqlite3
-from Candidates_DB import create_table, insert_candidate, fetch_candidates
+from repository import read_connection, write
+from text_extraction import extract_text_cached
+from text_preprocess import load_tokenizer, prepare_prompt_text
+from Candidates_DB import create_table
+import candidate_store
+from candidate_store import (
+    distinct_statuses, insert_candidates, query_candidates_page, search_candidates, to_candidate_row, upsert_candidates
+)
 
 # Load environment variables
 load_dotenv("credentials.env",override=True)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Prompt tokens given to resume and job-description text when scoring
+RESUME_TEXT_MAX_TOKENS = int(os.getenv("RESUME_TEXT_MAX_TOKENS", "3000"))
+JD_TEXT_MAX_TOKENS = int(os.getenv("JD_TEXT_MAX_TOKENS", "3000"))
+# Loads once per process, from TIKTOKEN_CACHE_DIR when it is set
+load_tokenizer()
+
 CSV_FILE = 'candidates.csv'
 
 # Twilio config
@@ -41,36 +51,18 @@ YOUR_EMAIL_PASSWORD = os.getenv("YOUR_EMAIL_PASSWORD")
 # Create the candidates table in the database
 create_table()
 
-# Connect to SQLite database
-def get_connection():
-    return sqlite3.connect('candidates.db', check_same_thread=False)
-
 # Insert candidate into DB
 def insert_candidate_db(name, email, phone, skills, education="", certifications="", experience="", phone_number="", linkedin="", score=0, status=""):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO candidates (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)
-    )
-    conn.commit()
-    conn.close()
-
-def extract_text_from_docx(file):
-    doc = docx.Document(file)
-    return "\n".join([para.text for para in doc.paragraphs])
+    write(insert_candidates, [(name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)])
 
 def extract_text_from_file(file):
-    if file.type == "application/pdf":
-        return extract_text(file)
-    elif file.type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-        return extract_text_from_docx(file)
-    else:
-        return file.read().decode("utf-8", errors="ignore")
+    # Cached by file content, so Streamlit reruns and repeat uploads skip re-parsing
+    return extract_text_cached(file.getvalue(), file.type)
 
 def extract_and_score_candidate(resume_text, job_desc):
-    job_desc_short = job_desc
-    resume_text_short = resume_text
+    # Whitespace, page furniture and repeated lines cost tokens on every candidate
+    job_desc_short = prepare_prompt_text(job_desc, JD_TEXT_MAX_TOKENS)
+    resume_text_short = prepare_prompt_text(resume_text, RESUME_TEXT_MAX_TOKENS)
     prompt = (
         "Given the following job description:\n"
         f"{job_desc_short}\n\n"
@@ -277,15 +269,8 @@ def display_chat_transcript():
         st.error("Could not fetch transcript from backend.")
 
 def candidate_exists(email, phone):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT 1 FROM candidates WHERE email = ? OR phone_number = ?",
-        (email, phone)
-    )
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
+    with read_connection() as conn:
+        return candidate_store.candidate_exists(conn, email, phone)
 
 # Secondary interview scoring method removed - using only primary AI scoring method
 
@@ -376,33 +361,19 @@ def main():
             df["call_status"] = "not called"
             st.session_state['df'] = df
 
-            # Save extracted candidates to the database
+            # Save extracted candidates to the database in one transaction,
+            # skipping anyone already stored with the same email or phone
             if not df.empty:
-                for _, row in df.iterrows():
-                    skills = row.get('skills', '')
-                    if isinstance(skills, list):
-                        skills = ', '.join(skills)
-                    email = row.get('email', '')
-                    phone = row.get('phone number', '')
-                    certifications = row.get('certifications', '') or ''
-                    if not candidate_exists(email, phone):
-                        insert_candidate(
-                            row.get('name', ''),
-                            skills,
-                            row.get('education', ''),
-                            certifications,
-                            row.get('experience', ''),
-                            email,
-                            phone,
-                            row.get('linkedin', ''),
-                            row.get('score', 0),
-                            row.get('Status', '')
-                        )
+                records = df.to_dict('records')
+                rows = [to_candidate_row(dict(record, status=record.get('Status', ''))) for record in records]
+                outcomes = write(upsert_candidates, rows, on_conflict='ignore')
+                for record, outcome in zip(records, outcomes):
+                    if outcome == 'inserted':
                         # Send status email
                         send_candidate_status_email(
-                            candidate_email=email,
-                            candidate_name=row.get('name', ''),
-                            status=row.get('Status', '')
+                            candidate_email=record.get('email', ''),
+                            candidate_name=record.get('name', ''),
+                            status=record.get('Status', '')
                         )
                 st.success("Candidates saved to database!")
 
@@ -516,38 +487,43 @@ def main():
     # --- TAB 3: HR Management System ---
     with tab3:
         st.header("HR Management System")
-        candidates = fetch_candidates()
-        columns = [
-            "id", "name", "skills", "education", "certifications", "experience",
-            "email", "phone_number", "linkedin", "score", "status"
-        ]
-        if candidates:
-            df = pd.DataFrame(candidates, columns=columns)
-            df_display = df.drop(columns=['id'])
-
-            # --- Search and Filter UI ---
-            search_name = st.text_input("Search by Name or Email")
-            filter_skill = st.text_input("Filter by Skill (comma separated, e.g. Python,SQL)")
-            min_score, max_score = st.slider("Score Range", 0, 100, (0, 100))
-            status_options = ["All"] + sorted(df_display["status"].unique())
-            filter_status = st.selectbox("Filter by Status", status_options)
-
-            # --- Filtering Logic ---
+
+        # --- Search and Filter UI ---
+        search_name = st.text_input("Search by Name or Email")
+        filter_skill = st.text_input("Filter by Skill (comma separated, e.g. Python,SQL)")
+        skill_mode = st.radio("Match skills", ["all", "any"], horizontal=True)
+        min_score, max_score = st.slider("Score Range", 0, 100, (0, 100))
+        with read_connection() as conn:
+            status_options = ["All"] + distinct_statuses(conn)
+        filter_status = st.selectbox("Filter by Status", status_options)
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+        # Search, skills, status and score are filtered in the database, one page at a time.
+        # Keep the cursors of visited pages so we can step back.
+        filters_key = (search_name, filter_skill, skill_mode, filter_status, min_score, max_score, page_size)
+        if st.session_state.get('hr_filters') != filters_key:
+            st.session_state['hr_filters'] = filters_key
+            st.session_state['hr_cursors'] = [None]
+        cursors = st.session_state['hr_cursors']
+
+        page_filters = dict(
+            limit=page_size,
+            cursor=cursors[-1],
+            status=None if filter_status == "All" else filter_status,
+            min_score=min_score,
+            max_score=max_score,
+            skills=filter_skill,
+            skills_mode=skill_mode,
+        )
+        with read_connection() as conn:
             if search_name:
-                df_display = df_display[
-                    df_display["name"].str.contains(search_name, case=False, na=False) |
-                    df_display["email"].str.contains(search_name, case=False, na=False)
-                ]
-            if filter_skill:
-                skills = [s.strip().lower() for s in filter_skill.split(",") if s.strip()]
-                df_display = df_display[
-                    df_display["skills"].str.lower().apply(lambda x: all(skill in x for skill in skills))
-                ]
-            df_display = df_display[
-                (df_display["score"] >= min_score) & (df_display["score"] <= max_score)
-            ]
-            if filter_status != "All":
-                df_display = df_display[df_display["status"] == filter_status]
+                # Ranked full-text search instead of substring matching in pandas
+                page = search_candidates(conn, search_name, **page_filters)
+            else:
+                page = query_candidates_page(conn, sort='-id', **page_filters)
+
+        if page["candidates"]:
+            df_display = pd.DataFrame(page["candidates"]).drop(columns=['id'])
 
             # Rename columns for readability
             df_display = df_display.rename(columns={
@@ -561,6 +537,15 @@ def main():
                 "status": "Status"
             })
             st.dataframe(df_display, use_container_width=True)
+
+            st.caption(f"Page {len(cursors)}")
+            col_prev, col_next = st.columns(2)
+            if col_prev.button("Previous page", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+            if col_next.button("Next page", disabled=not page["next_cursor"]):
+                cursors.append(page["next_cursor"])
+                st.rerun()
         else:
             st.info("No candidates in the database yet.")
 
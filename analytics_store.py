@@ -0,0 +1,170 @@
+"""
+Read side of the analytics endpoints.
+
+Counters are maintained incrementally by triggers (see migrations.py), so
+these functions read a handful of small rows instead of scanning candidates.
+All functions take an open connection.
+
+The counters and rollups exist on the SQLite file only. On a server database
+read_dashboard() counts the candidates table directly, and the rollup
+readers below are not available (the API answers 501).
+"""
+from sqlalchemy import case, func, select
+
+from repository import candidates, execute, job_descriptions, on_sqlite
+
+_RECENT_CANDIDATES = (
+    select(candidates.c.name, candidates.c.score, candidates.c.status, candidates.c.email)
+    .order_by(candidates.c.id.desc())
+    .limit(10)
+)
+_LIVE_COUNTS = select(
+    func.count(),
+    func.coalesce(func.sum(case((candidates.c.score >= 70, 1), else_=0)), 0),
+    func.coalesce(func.sum(case((candidates.c.status == 'Interview Scheduled', 1), else_=0)), 0),
+    select(func.count()).select_from(job_descriptions).scalar_subquery(),
+).select_from(candidates)
+_LIVE_STATUS_COUNTS = (
+    select(func.coalesce(candidates.c.status, ''), func.count().label("candidates"))
+    .group_by(func.coalesce(candidates.c.status, ''))
+    .order_by(func.count().desc())
+)
+
+
+def _dashboard_counts(conn):
+    """(counters row, per-status counts) from the trigger-maintained tables, or counted live"""
+    if not on_sqlite(conn):
+        return execute(conn, _LIVE_COUNTS).fetchone(), execute(conn, _LIVE_STATUS_COUNTS).fetchall()
+    stats = conn.execute("""
+        SELECT total_candidates, qualified_candidates, scheduled_interviews, total_job_descriptions
+        FROM dashboard_stats WHERE id = 1
+    """).fetchone() or (0, 0, 0, 0)
+    status_counts = conn.execute(
+        "SELECT status, candidates FROM candidate_status_counts WHERE candidates > 0 ORDER BY candidates DESC"
+    ).fetchall()
+    return stats, status_counts
+
+
+def read_dashboard(conn):
+    """Dashboard counters, per-status counts and the ten most recent candidates"""
+    stats, status_counts = _dashboard_counts(conn)
+    recent_candidates = execute(conn, _RECENT_CANDIDATES).fetchall()
+    return {
+        "total_candidates": stats[0],
+        "qualified_candidates": stats[1],
+        "scheduled_interviews": stats[2],
+        "total_job_descriptions": stats[3],
+        "status_counts": {status or "Unknown": count for status, count in status_counts},
+        "recent_candidates": [
+            {
+                "name": candidate[0],
+                "score": candidate[1],
+                "status": candidate[2],
+                "email": candidate[3]
+            } for candidate in recent_candidates
+        ]
+    }
+
+
+# --- Daily rollups ---------------------------------------------------------
+
+SCORE_BUCKET_LABELS = [f"{low}-{low + 9}" for low in range(0, 90, 10)] + ["90-100"]
+DEFAULT_ACTIVITY_LIMIT = 20
+DEFAULT_SKILLS_LIMIT = 20
+
+
+def _range_filter(days):
+    """WHERE clause limiting a rollup to the last `days` days (today included)"""
+    if days is None:
+        return "1", ()
+    return "day >= date('now', ?)", (f"-{int(days) - 1} days",)
+
+
+def read_trends(conn, days=30):
+    """Per-day candidates added, qualified (score >= 70) and moved to Interview Scheduled"""
+    where, params = _range_filter(days)
+    series = {}
+
+    def point(day):
+        return series.setdefault(day, {"date": day, "candidates": 0, "qualified": 0, "interviews": 0})
+
+    for day, count in conn.execute(
+        f"SELECT day, SUM(candidates) FROM daily_status_counts WHERE {where} GROUP BY day", params
+    ):
+        point(day)["candidates"] = count
+    for day, count in conn.execute(
+        f"SELECT day, SUM(candidates) FROM daily_score_counts WHERE {where} AND bucket >= 7 GROUP BY day", params
+    ):
+        point(day)["qualified"] = count
+    for day, count in conn.execute(
+        f"SELECT day, candidates FROM daily_status_changes WHERE {where} AND status = 'Interview Scheduled'", params
+    ):
+        point(day)["interviews"] = count
+
+    if days is not None:
+        # Zero-fill so charts get one point per day
+        for (day,) in conn.execute(
+            "WITH RECURSIVE days(day) AS ("
+            " SELECT date('now', ?) UNION ALL SELECT date(day, '+1 day') FROM days WHERE day < date('now')"
+            ") SELECT day FROM days",
+            params,
+        ):
+            point(day)
+    return [series[day] for day in sorted(series)]
+
+
+def read_score_distribution(conn, days=None):
+    """Candidates per 10-point score bucket, highest bucket first"""
+    where, params = _range_filter(days)
+    counts = dict(conn.execute(
+        f"SELECT bucket, SUM(candidates) FROM daily_score_counts WHERE {where} GROUP BY bucket", params
+    ).fetchall())
+    total = sum(counts.values())
+    return [
+        {
+            "range": SCORE_BUCKET_LABELS[bucket],
+            "count": counts.get(bucket, 0),
+            "percentage": round(counts.get(bucket, 0) * 100 / total, 1) if total else 0
+        } for bucket in reversed(range(len(SCORE_BUCKET_LABELS)))
+    ]
+
+
+def read_status_breakdown(conn, days=None):
+    """Candidates per current status"""
+    where, params = _range_filter(days)
+    rows = conn.execute(
+        f"SELECT status, SUM(candidates) AS total FROM daily_status_counts WHERE {where} "
+        "GROUP BY status HAVING total > 0 ORDER BY total DESC",
+        params,
+    ).fetchall()
+    return [{"status": status or "Unknown", "count": count} for status, count in rows]
+
+
+def read_top_skills(conn, days=None, limit=DEFAULT_SKILLS_LIMIT):
+    """Most common normalized skills among candidates added in the range"""
+    where, params = _range_filter(days)
+    rows = conn.execute(
+        f"SELECT skill, SUM(candidates) AS total FROM daily_skill_counts WHERE {where} "
+        "GROUP BY skill HAVING total > 0 ORDER BY total DESC, skill LIMIT ?",
+        params + (limit,),
+    ).fetchall()
+    return [{"skill": skill, "count": count} for skill, count in rows]
+
+
+def read_recent_activity(conn, limit=DEFAULT_ACTIVITY_LIMIT):
+    """Newest candidate events first"""
+    rows = conn.execute(
+        "SELECT id, candidate_id, candidate_name, action, status, created_at "
+        "FROM candidate_activity ORDER BY id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [
+        {
+            "id": row[0],
+            "candidate_id": row[1],
+            "candidate": row[2],
+            "action": row[3],
+            "status": row[4],
+            "time": row[5]
+        } for row in rows
+    ]
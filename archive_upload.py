@@ -0,0 +1,188 @@
+"""
+Lazy iteration over ZIP and tar uploads of resumes.
+
+Recruiters send batches of hundreds of resumes as one archive. Members are
+read one at a time, straight out of the upload, into memory: nothing is
+extracted to disk, and only as many members are held at once as the caller
+is processing (ARCHIVE_WINDOW in the API). Tar files are read in stream mode,
+so they never need seeking; ZIP files are read through their central
+directory.
+
+Each member is capped at ARCHIVE_MAX_MEMBER_MB while it is decompressed, and
+the archive at ARCHIVE_MAX_MEMBERS readable documents, so a zip bomb or a
+runaway archive cannot take the process down. Unsupported and unreadable
+files are reported but do not count toward the cap.
+
+An archive that turns out to be damaged part-way through does not throw away
+the members read before the damage: iteration stops and the problem is kept
+in ArchiveMembers.error for the caller to report next to its results.
+"""
+import os
+import posixpath
+import tarfile
+import zipfile
+import zlib
+
+from text_extraction import DOCX_TYPES, PDF_TYPES
+from upload_spool import UPLOAD_WINDOW
+
+# Members of one archive extracted and scored at the same time; defaults to UPLOAD_WINDOW
+ARCHIVE_WINDOW = int(os.getenv("ARCHIVE_WINDOW", "0")) or UPLOAD_WINDOW
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "2000"))
+ARCHIVE_MAX_MEMBER_MB = float(os.getenv("ARCHIVE_MAX_MEMBER_MB", "20"))
+
+# Raised when the archive itself (not one member) is damaged: truncated
+# streams, bad compressed data, a broken ZIP central directory
+ARCHIVE_ERRORS = (tarfile.TarError, zipfile.BadZipFile, EOFError, zlib.error, OSError)
+
+MEMBER_TYPES = {
+    ".pdf": PDF_TYPES[0],
+    ".docx": DOCX_TYPES[0],
+    ".doc": "application/msword",
+    ".txt": "text/plain",
+}
+
+
+class ArchiveMember:
+    """One file of an archive: its content, or why it was not read"""
+
+    __slots__ = ("name", "content_type", "content", "error")
+
+    def __init__(self, name, content_type=None, content=None, error=None):
+        self.name = name
+        self.content_type = content_type
+        self.content = content
+        self.error = error
+
+
+def _is_junk(name):
+    # Finder metadata and dotfiles ride along in archives made on macOS
+    base = posixpath.basename(name)
+    return name.startswith("__MACOSX/") or base.startswith(".") or not base
+
+
+def _read_capped(stream, max_bytes):
+    content = stream.read(max_bytes + 1)
+    if len(content) > max_bytes:
+        return None
+    return content
+
+
+def _member(name, size, open_stream, max_bytes):
+    content_type = MEMBER_TYPES.get(posixpath.splitext(name)[1].lower())
+    if content_type is None:
+        return ArchiveMember(name, error="Unsupported file type")
+    if size > max_bytes:
+        return ArchiveMember(name, content_type, error="File is too large")
+    with open_stream() as stream:
+        content = _read_capped(stream, max_bytes)
+    if content is None:
+        return ArchiveMember(name, content_type, error="File is too large")
+    return ArchiveMember(name, content_type, content)
+
+
+def _read_zip_member(archive, info, max_bytes):
+    try:
+        return _member(info.filename, info.file_size, lambda: archive.open(info), max_bytes)
+    except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, OSError) as exc:
+        # Encrypted, corrupt or unsupported compression: fail this member only
+        return ArchiveMember(info.filename, error=f"Could not read member: {exc}")
+
+
+def _iter_zip(fileobj, max_bytes):
+    """Yield a read() callable per file; each must be called before the next one is asked for"""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or _is_junk(info.filename):
+                continue
+            yield lambda info=info: _read_zip_member(archive, info, max_bytes)
+
+
+def _iter_tar(fileobj, max_bytes):
+    """Yield a read() callable per file; each must be called before the next one is asked for"""
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode="r|*")
+    except tarfile.TarError:
+        raise ValueError("Upload is not a ZIP or tar archive") from None
+    with archive:
+        for info in archive:
+            if not info.isfile() or _is_junk(info.name):
+                continue
+            yield lambda info=info: _member(info.name, info.size, lambda: archive.extractfile(info), max_bytes)
+            # TarFile keeps every header it has read; drop them to keep memory flat
+            archive.members = []
+        # tarfile takes a cut-off or garbled compressed stream for the end of the
+        # archive; read out the padding and check the decompressor got to the end
+        stream = archive.fileobj
+        decompressor = getattr(stream, "cmp", None)
+        if decompressor is not None:
+            while stream.read(tarfile.RECORDSIZE):
+                pass
+            if not decompressor.eof:
+                raise tarfile.ReadError("compressed data ends before the end of the archive")
+
+
+class ArchiveMembers:
+    """
+    Iterator of the ArchiveMembers of one upload. After iteration, truncated
+    tells whether files were left out because of the cap, and error holds
+    the reason the archive could not be read to the end, if any.
+    """
+
+    def __init__(self, entries, max_members):
+        self._entries = entries
+        self.max_members = max_members
+        self.read = 0
+        self.documents = 0
+        self.truncated = False
+        self.error = None
+
+    def __iter__(self):
+        return self
+
+    def _damaged(self, exc):
+        self.close()
+        if not self.read:
+            raise ValueError(str(exc)) from None
+        self.error = f"Archive is damaged after {self.read} files: {exc}"
+        raise StopIteration from None
+
+    def __next__(self):
+        try:
+            read = next(self._entries)
+        except ARCHIVE_ERRORS as exc:
+            self._damaged(exc)
+        if self.max_members and self.documents >= self.max_members:
+            # Another file's header follows the cap; its content is never read
+            self.truncated = True
+            self.close()
+            raise StopIteration
+        try:
+            member = read()
+        except ARCHIVE_ERRORS as exc:
+            self._damaged(exc)
+        self.read += 1
+        if member.error is None:
+            self.documents += 1
+        return member
+
+    def close(self):
+        self._entries.close()
+
+
+def iter_archive_members(fileobj, max_members=ARCHIVE_MAX_MEMBERS, max_member_mb=ARCHIVE_MAX_MEMBER_MB):
+    """
+    Iterate an ArchiveMember per file of a ZIP or tar (optionally gzip/bz2/xz)
+    archive, reading each member only when it is reached. Stops after
+    max_members readable documents; raises ValueError when the upload is not
+    an archive or is damaged before its first file. Probes the upload, so
+    call it off the event loop.
+    """
+    max_bytes = int(max_member_mb * 1024 * 1024)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        entries = _iter_zip(fileobj, max_bytes)
+    else:
+        fileobj.seek(0)
+        entries = _iter_tar(fileobj, max_bytes)
+    return ArchiveMembers(entries, max_members)
@@ -0,0 +1,160 @@
+"""
+Hot/cold archival of candidates.
+
+Candidates older than ARCHIVE_AFTER_DAYS, or in a terminal status
+(ARCHIVE_STATUSES), are moved from candidates into candidates_archive in
+batches, one transaction per batch (through the write queue on SQLite). The
+hot table, its search index and skills index stay small, so every existing
+endpoint keeps working on the active pipeline only.
+
+The dashboard counters follow the hot table. The daily analytics rollups
+keep counting archived candidates, so trends do not drop when old rows move
+out. Reads opt into archived rows with include_archived (GET /candidates,
+the CSV export).
+
+    python candidate_archive.py --older-than-days 180 --status Rejected --status Hired
+"""
+import argparse
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, delete, func, insert, literal, or_, select, text
+
+from candidate_store import CANDIDATE_COLUMNS
+from migrations import SCORE_BUCKET_SQL
+from repository import (
+    candidate_archive_skills, candidate_skills, candidates, candidates_archive, execute, on_sqlite, touch_table,
+    utc_timestamp, write
+)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_STATUSES = tuple(
+    status.strip() for status in os.getenv("ARCHIVE_STATUSES", "Rejected,Hired").split(",") if status.strip()
+)
+ARCHIVE_BATCH_SIZE = 1000
+
+_ARCHIVE_COLUMNS = ("id",) + CANDIDATE_COLUMNS + ("created_at",)
+
+# The delete triggers take archived candidates out of the daily rollups (SQLite only); these put them back
+_RESTORE_STATUS_ROLLUP = text("""
+    INSERT INTO daily_status_counts (day, status, candidates)
+    SELECT date(created_at), COALESCE(status, ''), COUNT(*) FROM candidates_archive
+    WHERE id IN :ids GROUP BY 1, 2
+    ON CONFLICT (day, status) DO UPDATE SET candidates = candidates + excluded.candidates
+""").bindparams(bindparam("ids", expanding=True))
+_RESTORE_SCORE_ROLLUP = text(f"""
+    INSERT INTO daily_score_counts (day, bucket, candidates)
+    SELECT date(created_at), {SCORE_BUCKET_SQL.format(row='candidates_archive')}, COUNT(*) FROM candidates_archive
+    WHERE id IN :ids GROUP BY 1, 2
+    ON CONFLICT (day, bucket) DO UPDATE SET candidates = candidates + excluded.candidates
+""").bindparams(bindparam("ids", expanding=True))
+_RESTORE_SKILL_ROLLUP = text("""
+    INSERT INTO daily_skill_counts (day, skill, candidates) VALUES (:day, :skill, :candidates)
+    ON CONFLICT (day, skill) DO UPDATE SET candidates = candidates + excluded.candidates
+""")
+
+
+def _archive_condition(older_than_days, statuses):
+    conditions = []
+    if older_than_days is not None:
+        # created_at is stored as 'YYYY-MM-DD HH:MM:SS' UTC, so the cutoff compares as text
+        cutoff = datetime.now(timezone.utc) - timedelta(days=int(older_than_days))
+        conditions.append(candidates.c.created_at < cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+    if statuses:
+        conditions.append(candidates.c.status.in_(list(statuses)))
+    if not conditions:
+        raise ValueError("Give an age, statuses, or both")
+    return or_(*conditions)
+
+
+def count_archivable(conn, older_than_days=ARCHIVE_AFTER_DAYS, statuses=ARCHIVE_STATUSES):
+    """How many hot candidates match the archival rules"""
+    condition = _archive_condition(older_than_days, statuses)
+    return execute(conn, select(func.count()).select_from(candidates).where(condition)).fetchone()[0]
+
+
+def _restore_rollups(conn, ids, skills):
+    execute(conn, _RESTORE_STATUS_ROLLUP.params(ids=ids))
+    execute(conn, _RESTORE_SCORE_ROLLUP.params(ids=ids))
+    counts = Counter((day, skill) for skill, _, day in skills)
+    if counts:
+        execute(conn, _RESTORE_SKILL_ROLLUP, [
+            {"day": day, "skill": skill, "candidates": count} for (day, skill), count in counts.items()
+        ])
+
+
+def archive_batch(conn, older_than_days=ARCHIVE_AFTER_DAYS, statuses=ARCHIVE_STATUSES,
+                  batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to batch_size matching candidates into the archive; returns how many moved"""
+    condition = _archive_condition(older_than_days, statuses)
+    ids = [row[0] for row in execute(conn, (
+        select(candidates.c.id).where(condition).order_by(candidates.c.id).limit(batch_size)
+    ))]
+    if not ids:
+        return 0
+
+    # Skills go with the candidate; read them before the delete cascades them away
+    skills = execute(conn, (
+        select(candidate_skills.c.skill, candidate_skills.c.candidate_id, func.substr(candidates.c.created_at, 1, 10))
+        .join(candidates, candidates.c.id == candidate_skills.c.candidate_id)
+        .where(candidate_skills.c.candidate_id.in_(ids))
+    )).fetchall()
+    # Replaces any earlier copy, as ids are never reused
+    execute(conn, delete(candidate_archive_skills).where(candidate_archive_skills.c.candidate_id.in_(ids)))
+    execute(conn, delete(candidates_archive).where(candidates_archive.c.id.in_(ids)))
+    execute(conn, insert(candidates_archive).from_select(
+        _ARCHIVE_COLUMNS + ("archived_at",),
+        select(*(candidates.c[column] for column in _ARCHIVE_COLUMNS), literal(utc_timestamp()))
+        .where(candidates.c.id.in_(ids)),
+    ))
+    if skills:
+        execute(conn, insert(candidate_archive_skills).values(
+            skill=bindparam("skill"), candidate_id=bindparam("candidate_id")
+        ), [{"skill": skill, "candidate_id": candidate_id} for skill, candidate_id, _ in skills])
+    execute(conn, delete(candidate_skills).where(candidate_skills.c.candidate_id.in_(ids)))
+    execute(conn, delete(candidates).where(candidates.c.id.in_(ids)))
+    touch_table(conn, "candidates")
+
+    if on_sqlite(conn):
+        _restore_rollups(conn, ids, skills)
+    return len(ids)
+
+
+def archive_candidates(older_than_days=ARCHIVE_AFTER_DAYS, statuses=ARCHIVE_STATUSES,
+                       batch_size=ARCHIVE_BATCH_SIZE):
+    """Archive every matching candidate, one write transaction per batch; returns the total moved"""
+    _archive_condition(older_than_days, statuses)  # fail fast on empty rules
+    total = 0
+    while True:
+        moved = write(archive_batch, older_than_days, statuses, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old or closed candidates into candidates_archive")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="archive candidates added more than this many days ago (0 disables)")
+    parser.add_argument("--status", action="append", dest="statuses",
+                        help="terminal status to archive; repeat for several (default: ARCHIVE_STATUSES)")
+    parser.add_argument("--dry-run", action="store_true", help="only count matching candidates")
+    args = parser.parse_args(argv)
+    older_than_days = args.older_than_days or None
+    statuses = tuple(args.statuses) if args.statuses else ARCHIVE_STATUSES
+
+    from repository import close_writes, create_schema, read_connection
+    create_schema()
+    if args.dry_run:
+        with read_connection() as conn:
+            print(f"{count_archivable(conn, older_than_days, statuses)} candidates would be archived")
+        return
+    try:
+        print(f"Archived {archive_candidates(older_than_days, statuses)} candidates")
+    finally:
+        close_writes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Streaming CSV import/export for the candidates table.
+
+Imports read the file row by row and write it in chunks, one transaction per
+chunk (through the write queue on SQLite), so memory stays flat however large
+the file is. Exports walk the table by id in chunks, each chunk on its own short read,
+so a long download never pins an old WAL snapshot.
+
+Headers are matched case-insensitively, so files from HR_app ("phone number",
+"Status"), call.py ("Name", "Phone", "Score") and our own exports all load.
+
+    python candidate_csv.py import ats_export.csv --on-conflict update
+    python candidate_csv.py export candidates.csv
+"""
+import argparse
+import csv
+import io
+import sys
+
+from sqlalchemy import bindparam, select
+
+from candidate_store import (
+    CANDIDATE_COLUMNS, candidate_source, insert_candidates, to_candidate_row, upsert_candidates, with_defaults
+)
+from repository import close_writes, execute, read_connection, submit_write
+
+CSV_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = ("id",) + CANDIDATE_COLUMNS
+ON_CONFLICT_MODES = ("insert", "update", "ignore")
+
+
+def _normalize_header(name):
+    return " ".join((name or "").strip().lower().replace("_", " ").split())
+
+
+def _write_chunk(conn, rows, on_conflict, default_status):
+    if on_conflict == "insert":
+        return ["inserted"] * insert_candidates(conn, [with_defaults(row, default_status) for row in rows])
+    return upsert_candidates(conn, rows, on_conflict, default_status)
+
+
+def import_candidates_csv(text_stream, on_conflict="update", chunk_size=CSV_CHUNK_SIZE, default_status="New"):
+    """
+    Load candidates from a CSV text stream, chunk_size rows per transaction.
+    on_conflict is 'insert' (no duplicate check), 'update' or 'ignore'
+    (match on email or phone). Columns the file lacks, and empty cells, keep
+    the stored value of an updated candidate; new candidates get a score of
+    0 and default_status. Returns counts per outcome.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {', '.join(ON_CONFLICT_MODES)}")
+    reader = csv.reader(text_stream)
+    try:
+        header = [_normalize_header(name) for name in next(reader)]
+    except StopIteration:
+        return {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    if "name" not in header:
+        raise ValueError("CSV must have a name column")
+
+    counts = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    pending = None  # the previous chunk keeps writing while the next one is parsed
+
+    def collect(future):
+        for outcome in future.result():
+            counts[outcome] += 1
+
+    chunk = []
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        # Defaults are applied to inserted rows only, in _write_chunk
+        chunk.append(to_candidate_row(dict(zip(header, values)), default_status='', default_score=''))
+        if len(chunk) >= chunk_size:
+            if pending is not None:
+                collect(pending)
+            pending = submit_write(_write_chunk, chunk, on_conflict, default_status)
+            counts["rows"] += len(chunk)
+            chunk = []
+    if chunk:
+        if pending is not None:
+            collect(pending)
+        pending = submit_write(_write_chunk, chunk, on_conflict, default_status)
+        counts["rows"] += len(chunk)
+    if pending is not None:
+        collect(pending)
+    return counts
+
+
+def iter_candidate_rows(chunk_size=CSV_CHUNK_SIZE, include_archived=False):
+    """Yield candidate rows in id order, reading chunk_size rows per query"""
+    source = candidate_source(include_archived)
+    chunk = (
+        select(*(source.c[column] for column in EXPORT_COLUMNS))
+        .where(source.c.id > bindparam("last_id"))
+        .order_by(source.c.id)
+        .limit(chunk_size)
+    )
+    last_id = 0
+    while True:
+        with read_connection() as conn:
+            rows = execute(conn, chunk, {"last_id": last_id}).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def iter_candidates_csv(chunk_size=CSV_CHUNK_SIZE, include_archived=False):
+    """Yield the candidates table as CSV text, one block per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(iter_candidate_rows(chunk_size, include_archived), 1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_candidates_csv(text_stream, chunk_size=CSV_CHUNK_SIZE, include_archived=False):
+    """Write the candidates table as CSV to a text stream"""
+    for block in iter_candidates_csv(chunk_size, include_archived):
+        text_stream.write(block)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export candidates as CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="load a CSV file into the candidates table")
+    import_parser.add_argument("path", help="CSV file, or - for stdin")
+    import_parser.add_argument("--on-conflict", choices=ON_CONFLICT_MODES, default="update")
+    import_parser.add_argument("--chunk-size", type=int, default=CSV_CHUNK_SIZE)
+    export_parser = commands.add_parser("export", help="write the candidates table to a CSV file")
+    export_parser.add_argument("path", help="CSV file, or - for stdout")
+    export_parser.add_argument("--chunk-size", type=int, default=CSV_CHUNK_SIZE)
+    export_parser.add_argument("--include-archived", action="store_true", help="also export candidates_archive")
+    args = parser.parse_args(argv)
+
+    from repository import create_schema
+    create_schema()
+    try:
+        if args.command == "import":
+            if args.path == "-":
+                counts = import_candidates_csv(sys.stdin, args.on_conflict, args.chunk_size)
+            else:
+                with open(args.path, newline="", encoding="utf-8-sig") as f:
+                    counts = import_candidates_csv(f, args.on_conflict, args.chunk_size)
+            print(
+                f"Imported {counts['rows']} rows: {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['skipped']} skipped",
+                file=sys.stderr,
+            )
+        elif args.path == "-":
+            export_candidates_csv(sys.stdout, args.chunk_size, args.include_archived)
+        else:
+            with open(args.path, "w", newline="", encoding="utf-8") as f:
+                export_candidates_csv(f, args.chunk_size, args.include_archived)
+    finally:
+        close_writes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+"""
+Candidate table access: batched writes, keyset-paginated reads, search and
+the normalized skills index.
+
+Parsed candidates are collected into batches and written with executemany in
+a single transaction, so a batch costs one commit (and one fsync) instead of
+one per candidate. All functions take an open connection so they compose with
+repository.read_connection()/write() and db_async.run_read()/run_write(), and
+are built from the Core statements in repository.py, so they run on the
+SQLite file and on a server database alike.
+"""
+import base64
+import json
+import re
+
+from sqlalchemy import (
+    and_, bindparam, delete, func, insert, intersect, literal_column, or_, select, table, tuple_, union, union_all,
+    update
+)
+
+from repository import (
+    candidate_archive_skills, candidate_skills, candidates, candidates_archive, execute, on_sqlite, touch_table,
+    utc_timestamp
+)
+
+# Column order used by every INSERT into candidates; created_at is stamped on insert
+CANDIDATE_COLUMNS = (
+    "name", "skills", "education", "certifications", "experience",
+    "email", "phone_number", "linkedin", "score", "status",
+)
+
+_INSERT_CANDIDATE = insert(candidates).values(
+    {column: bindparam(column) for column in CANDIDATE_COLUMNS + ("created_at",)}
+)
+
+# Empty values in an update are bound as NULL and keep what is already stored
+_UPDATE_CANDIDATE = (
+    update(candidates)
+    .where(candidates.c.id == bindparam("candidate_id"))
+    .values({column: func.coalesce(bindparam(column), candidates.c[column]) for column in CANDIDATE_COLUMNS})
+)
+
+_INSERT_SKILL = insert(candidate_skills).values(skill=bindparam("skill"), candidate_id=bindparam("candidate_id"))
+
+# Stay well below SQLite's bound-parameter limit in IN (...) lookups
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    if isinstance(value, float) and value != value:  # NaN from pandas
+        return ''
+    return str(value)
+
+
+def _score(value, default=0):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if score != score else score
+
+
+def to_candidate_row(candidate, default_status='New', default_score=0):
+    """
+    Turn a parsed candidate dict into a tuple ordered like CANDIDATE_COLUMNS.
+    Pass default_status='' and default_score='' to leave a missing status and
+    score empty, so an upsert keeps the stored values (see with_defaults).
+    """
+    phone = candidate.get('phone_number')
+    if phone is None:
+        phone = candidate.get('phone number', candidate.get('phone', ''))
+    return (
+        _text(candidate.get('name', '')),
+        _text(candidate.get('skills', '')),
+        _text(candidate.get('education', '')),
+        _text(candidate.get('certifications', '')),
+        _text(candidate.get('experience', '')),
+        _text(candidate.get('email', '')).strip(),
+        _text(phone).strip(),
+        _text(candidate.get('linkedin', '')),
+        _score(candidate.get('score'), default_score),
+        _text(candidate.get('status') or candidate.get('Status') or default_status),
+    )
+
+
+_SCORE_INDEX = CANDIDATE_COLUMNS.index("score")
+_STATUS_INDEX = CANDIDATE_COLUMNS.index("status")
+
+
+def with_defaults(row, default_status='New'):
+    """Row as it is inserted: an empty score becomes 0 and an empty status default_status"""
+    if row[_SCORE_INDEX] not in ('', None) and row[_STATUS_INDEX] not in ('', None):
+        return row
+    row = list(row)
+    if row[_SCORE_INDEX] in ('', None):
+        row[_SCORE_INDEX] = 0
+    if row[_STATUS_INDEX] in ('', None):
+        row[_STATUS_INDEX] = default_status
+    return tuple(row)
+
+
+# --- Normalized skills -----------------------------------------------------
+
+# Skills arrive as free text; commas, semicolons, pipes, bullets and newlines separate them
+SKILL_SEPARATORS = re.compile(r"[,;|\n\u2022]+")
+
+
+def normalize_skills(text):
+    """Split a skills string into unique canonical lowercase tokens"""
+    skills = []
+    for part in SKILL_SEPARATORS.split(text or ''):
+        skill = " ".join(part.lower().split()).strip(" .-*")
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+
+def sync_candidate_skills(conn, condition=None):
+    """Rebuild candidate_skills rows for the candidates matching a Core condition (all of them by default)"""
+    ids = select(candidates.c.id)
+    rows = select(candidates.c.id, candidates.c.skills)
+    if condition is not None:
+        ids, rows = ids.where(condition), rows.where(condition)
+    execute(conn, delete(candidate_skills).where(candidate_skills.c.candidate_id.in_(ids.scalar_subquery())))
+    # normalize_skills() returns each skill once, so the fresh rows cannot collide
+    params = [
+        {"skill": skill, "candidate_id": candidate_id}
+        for candidate_id, text in execute(conn, rows).fetchall()
+        for skill in normalize_skills(text)
+    ]
+    if params:
+        execute(conn, _INSERT_SKILL, params)
+
+
+def sync_skills_for_ids(conn, candidate_ids):
+    for chunk in _chunks(candidate_ids):
+        sync_candidate_skills(conn, candidates.c.id.in_(chunk))
+
+
+def skill_filter(skills, mode='all', skills_table=candidate_skills):
+    """
+    Core select of the candidate ids that have all (mode='all') or any
+    (mode='any') of the given skills, as an INTERSECT / UNION of
+    candidate_skills index lookups (or candidate_archive_skills via
+    skills_table=). Returns None when no skills are given.
+    """
+    if mode not in ('all', 'any'):
+        raise ValueError(f"skills_mode must be 'all' or 'any', not {mode!r}")
+    if isinstance(skills, str):
+        skills = normalize_skills(skills)
+    skills = list(dict.fromkeys(skills or []))
+    if not skills:
+        return None
+    lookups = [select(skills_table.c.candidate_id).where(skills_table.c.skill == skill) for skill in skills]
+    if len(lookups) == 1:
+        return lookups[0]
+    return intersect(*lookups) if mode == 'all' else union(*lookups)
+
+
+def candidate_ids_with_skills(conn, skills, mode='all'):
+    """Ids of candidates having all / any of the given skills"""
+    lookup = skill_filter(skills, mode)
+    if lookup is None:
+        return []
+    return [row[0] for row in execute(conn, lookup)]
+
+
+def top_skills(conn, limit=20):
+    """Most common skills with their candidate counts"""
+    count = func.count().label("candidates")
+    return execute(conn, (
+        select(candidate_skills.c.skill, count)
+        .group_by(candidate_skills.c.skill)
+        .order_by(count.desc(), candidate_skills.c.skill)
+        .limit(limit)
+    )).fetchall()
+
+
+def _inserted_ids(conn, params):
+    """Insert candidate rows and return their ids"""
+    if on_sqlite(conn):
+        # Writes hold the database lock and AUTOINCREMENT ids only grow, so everything above the current max is ours
+        last_id = execute(conn, select(func.coalesce(func.max(candidates.c.id), 0))).fetchone()[0]
+        execute(conn, _INSERT_CANDIDATE, params)
+        return [row[0] for row in execute(conn, select(candidates.c.id).where(candidates.c.id > last_id))]
+    if conn.dialect.insert_executemany_returning:
+        return list(conn.execute(_INSERT_CANDIDATE.returning(candidates.c.id), params).scalars())
+    return [conn.execute(_INSERT_CANDIDATE, row).inserted_primary_key[0] for row in params]
+
+
+def insert_candidates(conn, rows):
+    """Insert candidate rows with one executemany and return how many were written"""
+    rows = list(rows)
+    if rows:
+        created_at = utc_timestamp()
+        params = [dict(zip(CANDIDATE_COLUMNS, row), created_at=created_at) for row in rows]
+        sync_skills_for_ids(conn, _inserted_ids(conn, params))
+        touch_table(conn, "candidates")
+    return len(rows)
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def find_existing_ids(conn, emails, phones):
+    """
+    Map existing email/phone values to candidate ids using the lookup indexes,
+    in the hot table first and then in candidates_archive. Returns
+    (by_email, by_phone, archived_ids).
+    """
+    by_email, by_phone, archived_ids = {}, {}, set()
+    for source in (candidates, candidates_archive):
+        for column, values, found in (("email", emails, by_email), ("phone_number", phones, by_phone)):
+            for chunk in _chunks(sorted(set(values) - found.keys())):
+                lookup = select(source.c.id, source.c[column]).where(source.c[column].in_(chunk))
+                for candidate_id, value in execute(conn, lookup):
+                    found.setdefault(value, candidate_id)
+                    if source is candidates_archive:
+                        archived_ids.add(candidate_id)
+    return by_email, by_phone, archived_ids
+
+
+def upsert_candidates(conn, rows, on_conflict='update', default_status='New'):
+    """
+    Insert or update candidate rows keyed on email or phone number.
+
+    Rows matching an existing candidate (or an earlier row in the same batch)
+    by non-empty email or phone are updated when on_conflict is 'update' and
+    left alone when it is 'ignore'. Archived candidates count as existing but
+    are never modified, so a row matching one is always skipped. Empty values in an update keep what is
+    stored; inserted rows get a score of 0 and default_status where theirs is
+    empty. Returns one of 'inserted', 'updated' or 'skipped' per input row,
+    in order.
+    """
+    if on_conflict not in ('update', 'ignore'):
+        raise ValueError(f"on_conflict must be 'update' or 'ignore', not {on_conflict!r}")
+    rows = list(rows)
+    email_index = CANDIDATE_COLUMNS.index("email")
+    phone_index = CANDIDATE_COLUMNS.index("phone_number")
+
+    by_email, by_phone, archived_ids = find_existing_ids(
+        conn,
+        {row[email_index] for row in rows if row[email_index]},
+        {row[phone_index] for row in rows if row[phone_index]},
+    )
+
+    outcomes = []
+    inserts, updates = [], []
+    pending = {}  # email/phone key -> index into inserts, for duplicates inside the batch
+    for row in rows:
+        keys = [('email', row[email_index]), ('phone', row[phone_index])]
+        keys = [key for key in keys if key[1]]
+        existing_id = None
+        for kind, value in keys:
+            existing_id = (by_email if kind == 'email' else by_phone).get(value)
+            if existing_id is not None:
+                break
+        pending_index = next((pending[key] for key in keys if key in pending), None)
+
+        if existing_id is None and pending_index is None:
+            for key in keys:
+                pending[key] = len(inserts)
+            inserts.append(row)
+            outcomes.append('inserted')
+        elif on_conflict == 'ignore' or existing_id in archived_ids:
+            outcomes.append('skipped')
+        elif existing_id is not None:
+            update_params = {column: None if value == '' else value for column, value in zip(CANDIDATE_COLUMNS, row)}
+            update_params["candidate_id"] = existing_id
+            updates.append(update_params)
+            outcomes.append('updated')
+        else:
+            inserts[pending_index] = tuple(
+                new if new not in ('', None) else old for new, old in zip(row, inserts[pending_index])
+            )
+            for key in keys:
+                pending[key] = pending_index
+            outcomes.append('updated')
+
+    if updates:
+        execute(conn, _UPDATE_CANDIDATE, updates)
+        sync_skills_for_ids(conn, {update["candidate_id"] for update in updates})
+        touch_table(conn, "candidates")
+    insert_candidates(conn, [with_defaults(row, default_status) for row in inserts])
+    return outcomes
+
+
+class CandidateBatch:
+    """Collects parsed candidates and writes them in batches of batch_size"""
+
+    def __init__(self, conn, batch_size=500, upsert=False, on_conflict='update'):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.upsert = upsert
+        self.on_conflict = on_conflict
+        self.rows = []
+        self.outcomes = []
+
+    def add(self, candidate):
+        self.rows.append(to_candidate_row(candidate) if isinstance(candidate, dict) else tuple(candidate))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.upsert:
+            self.outcomes.extend(upsert_candidates(self.conn, self.rows, self.on_conflict))
+        else:
+            self.outcomes.extend(['inserted'] * insert_candidates(self.conn, self.rows))
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+# --- Paginated reads -------------------------------------------------------
+
+PAGE_COLUMNS = ("id",) + CANDIDATE_COLUMNS
+SORTABLE_COLUMNS = ("id", "name", "email", "score", "status")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def distinct_statuses(conn):
+    """Sorted list of statuses in use, read from the status index"""
+    return [row[0] for row in execute(conn, (
+        select(candidates.c.status).distinct().where(candidates.c.status.isnot(None)).order_by(candidates.c.status)
+    ))]
+
+
+def fetch_candidates(conn, columns=PAGE_COLUMNS, candidate_ids=None):
+    """Rows of the given columns for every candidate, or only for candidate_ids, in id order"""
+    statement = select(*(candidates.c[column] for column in columns)).order_by(candidates.c.id)
+    if candidate_ids is not None:
+        statement = statement.where(candidates.c.id.in_([int(candidate_id) for candidate_id in candidate_ids]))
+    return execute(conn, statement).fetchall()
+
+
+def fetch_emailable_candidates(conn):
+    """(name, email, score, status) of every scored candidate with an email address"""
+    return execute(conn, select(
+        candidates.c.name, candidates.c.email, candidates.c.score, candidates.c.status
+    ).where(
+        candidates.c.score.isnot(None), candidates.c.email.isnot(None), candidates.c.email != ''
+    ).order_by(candidates.c.id)).fetchall()
+
+
+def candidate_exists(conn, email, phone_number):
+    """Whether a live candidate has this email or phone number"""
+    return execute(conn, select(candidates.c.id).where(
+        or_(candidates.c.email == email, candidates.c.phone_number == phone_number)
+    ).limit(1)).fetchone() is not None
+
+
+def encode_cursor(sort_value, candidate_id):
+    """Opaque cursor pointing just after (sort_value, id)"""
+    payload = json.dumps([sort_value, candidate_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, candidate_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, int(candidate_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields):
+    """Validate a comma-separated fields= value; id is always included"""
+    if not fields:
+        return list(PAGE_COLUMNS)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in PAGE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ['id'] + [field for field in dict.fromkeys(requested) if field != 'id']
+
+
+def parse_sort(sort):
+    """Split 'score' / '-score' into (column, descending)"""
+    sort = (sort or 'id').strip()
+    descending = sort.startswith('-')
+    column = sort.lstrip('-+')
+    if column not in SORTABLE_COLUMNS:
+        raise ValueError(f"Cannot sort by {column!r}; choose one of {', '.join(SORTABLE_COLUMNS)}")
+    return column, descending
+
+
+def _candidate_filters(source, status, min_score, max_score, skills, skills_mode, include_archived=False):
+    """WHERE conditions on source's columns shared by the list and search queries"""
+    conditions = []
+    if status:
+        conditions.append(source.c.status == status)
+    if min_score is not None:
+        conditions.append(source.c.score >= min_score)
+    if max_score is not None:
+        conditions.append(source.c.score <= max_score)
+    lookup = skill_filter(skills, skills_mode)
+    if lookup is not None and include_archived:
+        archive_lookup = skill_filter(skills, skills_mode, skills_table=candidate_archive_skills)
+        conditions.append(or_(source.c.id.in_(lookup), source.c.id.in_(archive_lookup)))
+    elif lookup is not None:
+        conditions.append(source.c.id.in_(lookup))
+    return conditions
+
+
+def _segment_conditions(source, column, descending, cursor_value, cursor_id, has_cursor):
+    """
+    Yield conditions that together cover the rows after the cursor.
+
+    NULLs sort lowest, so ascending order is [NULL rows, non-NULL rows] and
+    descending order is the reverse. Each piece is a plain range condition so
+    the database can seek in the column index instead of scanning it.
+    """
+    ids = source.c.id
+    after = (lambda left, right: left < right) if descending else (lambda left, right: left > right)
+    if column == 'id':
+        yield after(ids, cursor_id) if has_cursor else None
+        return
+    values = source.c[column]
+    segments = ("value", "null") if descending else ("null", "value")
+    if has_cursor:
+        segments = segments[segments.index("null" if cursor_value is None else "value"):]
+    for segment in segments:
+        resume_here = has_cursor and (segment == "null") == (cursor_value is None)
+        if segment == "null":
+            yield and_(values.is_(None), after(ids, cursor_id)) if resume_here else values.is_(None)
+        elif resume_here:
+            yield after(tuple_(values, ids), tuple_(cursor_value, cursor_id))
+        else:
+            yield values.isnot(None)
+
+
+def candidate_source(include_archived=False):
+    """FROM target for candidate reads: the hot table, or hot plus archive"""
+    if not include_archived:
+        return candidates
+    return union_all(
+        select(*(candidates.c[column] for column in PAGE_COLUMNS)),
+        select(*(candidates_archive.c[column] for column in PAGE_COLUMNS)),
+    ).subquery("all_candidates")
+
+
+def query_candidates_page(conn, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, sort='id',
+                          status=None, min_score=None, max_score=None, skills=None, skills_mode='all',
+                          include_archived=False):
+    """
+    Return one keyset-paginated page of candidates.
+
+    The result is {"candidates": [...], "next_cursor": str or None}; pass
+    next_cursor back to get the following page. include_archived=True also
+    pages through candidates_archive. Raises ValueError for bad fields, sort
+    or cursor values.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    columns = parse_fields(fields)
+    sort_column, descending = parse_sort(sort)
+    select_columns = columns + ([sort_column] if sort_column not in columns else [])
+    cursor_value, cursor_id = decode_cursor(cursor) if cursor else (None, None)
+
+    source = candidate_source(include_archived)
+    filters = _candidate_filters(source, status, min_score, max_score, skills, skills_mode, include_archived)
+
+    order_by = [source.c.id] if sort_column == 'id' else [source.c[sort_column], source.c.id]
+    if descending:
+        order_by = [column.desc() for column in order_by]
+    page = select(*(source.c[column] for column in select_columns)).order_by(*order_by)
+
+    rows = []
+    for condition in _segment_conditions(source, sort_column, descending, cursor_value, cursor_id, bool(cursor)):
+        conditions = ([condition] if condition is not None else []) + filters
+        rows.extend(execute(conn, page.where(*conditions).limit(limit + 1 - len(rows))).fetchall())
+        if len(rows) > limit:
+            break
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    sort_index = select_columns.index(sort_column)
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_index], last[0])
+
+    return {
+        "candidates": [dict(zip(columns, row[:len(columns)])) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+# --- Full-text search ------------------------------------------------------
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    tokens = re.findall(r"\w+", (text or '').lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _encode_offset(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip('=')
+
+
+def _decode_offset(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return max(0, int(json.loads(base64.urlsafe_b64decode(padded.encode()))["offset"]))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# The external-content FTS5 index over candidates (migrations.py); SQLite only
+candidates_fts = table("candidates_fts", literal_column("rowid"), literal_column("rank"))
+
+
+def _contains_words(query):
+    """Condition for the server fallback: every word appears in one of the FTS-indexed columns"""
+    from migrations import FTS_COLUMNS
+    return and_(*(
+        or_(*(func.lower(candidates.c[name]).contains(word, autoescape=True) for name in FTS_COLUMNS))
+        for word in re.findall(r"\w+", query.lower())
+    ))
+
+
+def search_candidates(conn, query, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None,
+                      status=None, min_score=None, max_score=None, skills=None, skills_mode='all'):
+    """
+    Ranked full-text search over name, skills, experience, education,
+    certifications and email. A server database has no FTS index, so there
+    words are matched as substrings and the best scores come first.
+
+    Returns the same {"candidates": [...], "next_cursor": ...} shape as
+    query_candidates_page, best matches first.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    columns = parse_fields(fields)
+    offset = _decode_offset(cursor) if cursor else 0
+    match = build_match_query(query)
+    if not match:
+        return {"candidates": [], "next_cursor": None}
+
+    filters = _candidate_filters(candidates, status, min_score, max_score, skills, skills_mode)
+    statement = select(*(candidates.c[name] for name in columns))
+    if on_sqlite(conn):
+        statement = (
+            statement.select_from(candidates_fts.join(candidates, candidates.c.id == candidates_fts.c.rowid))
+            .where(literal_column("candidates_fts").op("MATCH")(match), *filters)
+            .order_by(candidates_fts.c.rank)
+        )
+    else:
+        statement = statement.where(_contains_words(query), *filters).order_by(
+            candidates.c.score.desc(), candidates.c.id
+        )
+    rows = execute(conn, statement.limit(limit + 1).offset(offset)).fetchall()
+    has_more = len(rows) > limit
+    return {
+        "candidates": [dict(zip(columns, row)) for row in rows[:limit]],
+        "next_cursor": _encode_offset(offset + limit) if has_more else None,
+    }
@@ -0,0 +1,65 @@
+"""
+Async data access for the FastAPI endpoints.
+
+Database calls block, so every query is shipped off the event loop and
+awaited. Reads share a small pool of worker threads; writes go through
+repository.submit_write(): on SQLite that is the single-writer queue in
+db_writer, which groups concurrent writes into one transaction.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import close_all
+from repository import close_writes, execute as execute_statement, read_connection, submit_write
+
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "8"))
+
+_read_executor = ThreadPoolExecutor(max_workers=DB_READ_WORKERS, thread_name_prefix="db-read")
+
+
+def _call_with_read(func, args, kwargs):
+    with read_connection() as conn:
+        return func(conn, *args, **kwargs)
+
+
+async def run_read(func, *args, **kwargs):
+    """Run func(conn, *args, **kwargs) on a pooled read connection off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _read_executor, functools.partial(_call_with_read, func, args, kwargs)
+    )
+
+
+async def run_write(func, *args, **kwargs):
+    """Run func(conn, *args, **kwargs) as a write job and await its commit"""
+    return await asyncio.wrap_future(submit_write(func, *args, **kwargs))
+
+
+async def run_sync(func, *args, **kwargs):
+    """Run a blocking call that manages its own connection (e.g. a repository method) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_read_executor, functools.partial(func, *args, **kwargs))
+
+
+async def fetch_all(statement, params=None):
+    """Return every row of a Core select"""
+    return await run_read(lambda conn: execute_statement(conn, statement, params).fetchall())
+
+
+async def fetch_one(statement, params=None):
+    """Return the first row of a Core select, or None"""
+    return await run_read(lambda conn: execute_statement(conn, statement, params).fetchone())
+
+
+async def execute(statement, params=None):
+    """Run a single Core write statement and return its row count"""
+    return await run_write(lambda conn: execute_statement(conn, statement, params).rowcount)
+
+
+def shutdown():
+    """Finish queued writes, stop the worker threads and close pooled connections"""
+    _read_executor.shutdown(wait=True)
+    close_writes()
+    close_all()
@@ -0,0 +1,161 @@
+"""
+Shared SQLite connection pool for candidates.db.
+
+Connections are opened once per process and reused. Every connection runs in
+WAL mode so readers never block the writer, and all writes go through a single
+writer connection guarded by a lock so threads in the same process queue up
+instead of fighting over the database lock.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.getenv("CANDIDATES_DB_PATH", "candidates.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "10000"))
+
+# Pragmas applied to every connection when it is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",      # safe with WAL, one fsync per checkpoint instead of per commit
+    "PRAGMA cache_size = -32000",       # 32 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",     # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+class ConnectionPool:
+    """Pool of reader connections plus one serialized writer connection"""
+
+    def __init__(self, path=DB_PATH, size=DB_POOL_SIZE, busy_timeout_ms=DB_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._readers = queue.LifoQueue(maxsize=size)
+        self._opened_readers = 0
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._closed = False
+
+    def _connect(self, readonly=False):
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves so readers never
+        # hold a snapshot open between statements
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if self._opened_readers < self.size:
+                self._opened_readers += 1
+                try:
+                    return self._connect(readonly=True)
+                except Exception:
+                    self._opened_readers -= 1
+                    raise
+        # Pool exhausted, wait for a connection to be returned
+        return self._readers.get(timeout=self.busy_timeout_ms / 1000)
+
+    def _release_reader(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._readers.put_nowait(conn)
+
+    @contextmanager
+    def read(self):
+        """Borrow a read-only connection"""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    @contextmanager
+    def write(self):
+        """Borrow the writer connection inside a single IMMEDIATE transaction"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            if conn.in_transaction:
+                # Nested use from the same thread joins the outer transaction
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._readers_lock:
+            self._opened_readers = 0
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Return the process-wide pool for a database file"""
+    path = path or DB_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = ConnectionPool(path)
+                _pools[path] = pool
+    return pool
+
+
+def read_connection(path=None):
+    """Context manager yielding a pooled read-only connection"""
+    return get_pool(path).read()
+
+
+def write_connection(path=None):
+    """Context manager yielding the pooled writer connection, committed on exit"""
+    return get_pool(path).write()
+
+
+def close_all():
+    """Close every pool opened by this process"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
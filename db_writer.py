@@ -0,0 +1,191 @@
+"""
+Single-writer queue for candidates.db.
+
+Every mutation is submitted as func(conn, *args, **kwargs) and gets a
+concurrent.futures.Future back. One background thread owns the writer
+connection: it takes whatever jobs are waiting and runs them in a single
+IMMEDIATE transaction, so a bulk upload and a call campaign running at the
+same time share commits instead of queuing on the database lock one
+statement at a time.
+
+When several jobs share a transaction, each runs inside its own SAVEPOINT: a
+job that raises is rolled back on its own and its future gets the exception;
+the rest of the group still commits. Futures resolve only after the group's
+COMMIT succeeds.
+
+The queue serializes writers inside one process. Separate processes (the
+Streamlit apps next to the API) each have their own queue and fall back on
+SQLite's busy timeout between them.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from db_pool import DB_PATH, write_connection
+
+# Most jobs grouped into one transaction
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+# How long the writer waits for more jobs before committing a group; 0 only
+# groups jobs that were already queued, which adds no latency to a lone write
+DB_WRITE_BATCH_WINDOW_MS = float(os.getenv("DB_WRITE_BATCH_WINDOW_MS", "0"))
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Funnel writes through one thread and commit them in groups"""
+
+    def __init__(self, path=DB_PATH, batch_size=DB_WRITE_BATCH_SIZE, window_ms=DB_WRITE_BATCH_WINDOW_MS):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        # Counters for monitoring how well writes coalesce
+        self.jobs_run = 0
+        self.transactions = 0
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(conn, *args, **kwargs) and return a Future for its result"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._jobs.put((future, func, args, kwargs))
+        return future
+
+    def write(self, func, *args, **kwargs):
+        """Submit a write and block until it has been committed"""
+        if threading.current_thread() is self._thread:
+            # Called from inside a job: join the transaction already open
+            with write_connection(self.path) as conn:
+                return func(conn, *args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def _collect(self):
+        """Block for one job, then take whatever else is ready up to batch_size"""
+        job = self._jobs.get()
+        if job is _STOP:
+            return [], True
+        jobs = [job]
+        deadline = time.monotonic() + self.window
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return jobs, True
+            jobs.append(job)
+        return jobs, False
+
+    def _run(self):
+        while True:
+            jobs, stop = self._collect()
+            if jobs:
+                self._run_group(jobs)
+            if stop:
+                return
+
+    def _run_group(self, jobs):
+        jobs = [job for job in jobs if job[0].set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            self._run_single(*jobs[0])
+            return
+        outcomes = []
+        try:
+            with write_connection(self.path) as conn:
+                for _, func, args, kwargs in jobs:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        result = func(conn, *args, **kwargs)
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO write_job")
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((False, exc))
+                    else:
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((True, result))
+        except Exception as exc:
+            # BEGIN or COMMIT failed: nothing in the group was written
+            for future, *_ in jobs:
+                future.set_exception(exc)
+            return
+        self.jobs_run += len(jobs)
+        self.transactions += 1
+        for (future, *_), (ok, value) in zip(jobs, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _run_single(self, future, func, args, kwargs):
+        # A lone job owns the whole transaction, so it needs no SAVEPOINT; skipping it
+        # matters for big jobs (bulk imports), where the savepoint journal triples the cost
+        try:
+            with write_connection(self.path) as conn:
+                result = func(conn, *args, **kwargs)
+        except Exception as exc:
+            future.set_exception(exc)
+            return
+        self.jobs_run += 1
+        self.transactions += 1
+        future.set_result(result)
+
+    def close(self):
+        """Run every queued job, then stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._jobs.put(_STOP)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(path=None):
+    """Return the process-wide write queue for a database file"""
+    path = path or DB_PATH
+    write_queue = _queues.get(path)
+    if write_queue is None:
+        with _queues_lock:
+            write_queue = _queues.get(path)
+            if write_queue is None:
+                write_queue = WriteQueue(path)
+                _queues[path] = write_queue
+    return write_queue
+
+
+def submit_write(func, *args, **kwargs):
+    """Queue func(conn, *args, **kwargs) on the default database; returns a Future"""
+    return get_write_queue().submit(func, *args, **kwargs)
+
+
+def write(func, *args, **kwargs):
+    """Run func(conn, *args, **kwargs) through the write queue and return its result"""
+    return get_write_queue().write(func, *args, **kwargs)
+
+
+def close_write_queues():
+    """Drain and stop every write queue opened by this process"""
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    for write_queue in queues:
+        write_queue.close()
@@ -0,0 +1,110 @@
+"""
+Streaming text extraction for Word (.docx) files.
+
+python-docx builds an object model of the whole document and its
+Document.paragraphs only covers top-level body paragraphs, so tables (where
+many resumes keep their skills), text boxes and page headers (where the
+name and contact details often are) were lost. This reads the XML parts
+straight out of the zip with lxml.iterparse instead: text is yielded as each
+paragraph or table row closes, and finished elements are cleared so memory
+stays flat however long the document is.
+
+Output order: page headers first (each distinct header once), then the body
+in document order. Table rows come out as one line each, with cells joined
+by " | ". Text boxes come out as their own lines, next to the paragraph that
+anchors them.
+"""
+import re
+import zipfile
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+_HEADER_PART = re.compile(r"word/header(\d*)\.xml$")
+_PARAGRAPH, _TEXT, _TAB, _BREAKS = W + "p", W + "t", W + "tab", (W + "br", W + "cr")
+_TABLE, _ROW, _CELL, _BODY = W + "tbl", W + "tr", W + "tc", W + "body"
+
+
+def iter_part_text(stream):
+    """Yield the text of one WordprocessingML part, a paragraph or table row at a time"""
+    from lxml import etree
+
+    paragraphs = []  # open paragraphs; text boxes nest one inside another
+    cells = []       # open table cells, each a list of paragraph texts
+    rows = []        # open table rows, each a list of cell texts
+    fallback = 0     # depth inside mc:Fallback, which repeats the mc:Choice content
+    for event, elem in etree.iterparse(stream, events=("start", "end"), resolve_entities=False):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            fallback += 1 if event == "start" else -1
+            continue
+        if fallback:
+            if event == "end":
+                elem.clear()
+            continue
+        if event == "start":
+            if tag == _PARAGRAPH:
+                paragraphs.append([])
+            elif tag == _CELL:
+                cells.append([])
+            elif tag == _ROW:
+                rows.append([])
+            continue
+
+        if tag == _TEXT:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == _TAB:
+            if paragraphs:
+                paragraphs[-1].append("\t")
+        elif tag in _BREAKS:
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == _PARAGRAPH:
+            text = "".join(paragraphs.pop()).strip()
+            if text:
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text + "\n"
+        elif tag == _CELL:
+            text = " ".join(cells.pop())
+            if rows:
+                rows[-1].append(text)
+        elif tag == _ROW:
+            row = " | ".join(cell for cell in rows.pop() if cell)
+            if row:
+                if cells:
+                    # A table nested inside a cell belongs to that cell
+                    cells[-1].append(row)
+                else:
+                    yield row + "\n"
+        elif tag != _TABLE:
+            continue
+
+        # Paragraphs, rows and tables are done with: free them and anything already read before them
+        elem.clear()
+        parent = elem.getparent()
+        if parent is not None and parent.tag == _BODY:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def _header_parts(archive):
+    parts = [name for name in archive.namelist() if _HEADER_PART.match(name)]
+    return sorted(parts, key=lambda name: int(_HEADER_PART.match(name).group(1) or 0))
+
+
+def iter_docx_text(f):
+    """Yield the text of a .docx file object: distinct page headers, then the body"""
+    with zipfile.ZipFile(f) as archive:
+        seen = set()
+        for name in _header_parts(archive):
+            with archive.open(name) as stream:
+                header = "".join(iter_part_text(stream))
+            # First-page, even-page and default headers usually repeat each other
+            if header and header not in seen:
+                seen.add(header)
+                yield header
+        with archive.open("word/document.xml") as stream:
+            yield from iter_part_text(stream)
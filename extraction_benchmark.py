@@ -0,0 +1,424 @@
+"""
+Benchmark for document text extraction.
+
+Generates a local corpus of PDF, DOCX and plain-text files (varied page
+counts, tables, a few large files, and a PDF whose later pages use a font
+without a Unicode map, so the tiered reader falls back to pdfminer), runs
+every extractor backend over it and reports, per format and backend:
+throughput, p50/p95 latency per document, peak memory per document and
+characters extracted.
+
+Run it before upgrading pdfminer.six, PyPDF2 or lxml, or after changing
+pdf_extraction.py, docx_extraction.py or text_extraction.py, and compare
+against a saved baseline:
+
+    python extraction_benchmark.py --save baseline.json
+    python extraction_benchmark.py --compare baseline.json
+
+The corpus is written once to bench_corpus/ and reused; --regenerate
+rebuilds it. Files are generated from a fixed seed, so runs are comparable
+across machines and commits. Timings are in-process (no worker pool or
+cache), so they measure the extractors themselves. Memory is the growth of
+peak RSS while extracting one document, measured in a fresh process per
+backend and document so lxml's and pdfminer's C allocations are counted too
+and one document's high-water mark does not hide the next one's.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from docx_extraction import iter_docx_text
+from pdf_extraction import iter_pdf_pages, iter_pdfminer_pages, iter_pypdf_pages
+from text_extraction import DOCX_TYPES, PDF_TYPES, extract_text
+
+BENCH_CORPUS_DIR = "bench_corpus"
+BENCH_SEED = 20240901
+
+CONTENT_TYPES = {"pdf": PDF_TYPES[0], "docx": DOCX_TYPES[0], "txt": "text/plain"}
+
+# (format, name, pages or paragraphs, table rows[, generator options])
+CORPUS = (
+    ("pdf", "resume_1p", 1, 0),
+    ("pdf", "resume_2p", 2, 8),
+    ("pdf", "resume_3p", 3, 0),
+    ("pdf", "cv_10p", 10, 20),
+    ("pdf", "portfolio_40p", 40, 0),
+    ("pdf", "large_200p", 200, 40),
+    # Page 1 reads fine; the rest come out of PyPDF2 as control characters and
+    # out of pdfminer as (cid:NN), so this times the tiered fallback
+    ("pdf", "cid_font_8p", 8, 0, {"cid_from": 1}),
+    ("docx", "resume_short", 40, 0),
+    ("docx", "resume_tables", 60, 30),
+    ("docx", "cv_long", 400, 60),
+    ("docx", "large", 8000, 400),
+    ("txt", "resume_small", 60, 0),
+    ("txt", "resume_long", 600, 0),
+    ("txt", "large", 60000, 0),
+)
+
+_WORDS = (
+    "python sql aws docker kubernetes react java engineer senior lead developer managed team "
+    "delivered platform data pipeline analytics cloud migration customer stakeholders agile "
+    "scrum design testing automation api microservices security compliance budget revenue "
+    "growth hiring mentoring architecture performance reliability monitoring incident university "
+    "bachelor master degree certified certification project roadmap strategy"
+).split()
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+# --- corpus generation ---------------------------------------------------
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_string(text):
+    return f"({_pdf_escape(text)})"
+
+
+def _cid_string(text):
+    # Two-byte glyph ids of a subset font, the way PDF exporters write them; with no
+    # ToUnicode map a reader cannot turn them back into the letters
+    return "<" + "".join(f"{3 + ord(char) % 29:04X}" for char in text) + ">"
+
+
+def _pdf_page(rng, page, table_rows, font="/F1", show=_pdf_string):
+    """Content stream for one page: a heading, body lines, and optionally a three-column table"""
+    ops = ["BT", f"{font} 14 Tf", "50 750 Td", f"{show(f'Section {page + 1}')} Tj", f"{font} 10 Tf", "14 TL"]
+    lines = 45 - table_rows
+    for _ in range(lines):
+        ops.append(f"T* {show(_sentence(rng, 10))} Tj")
+    ops.append("ET")
+    y = 740 - 14 * (lines + 2)
+    for row in range(table_rows):
+        for column, x in enumerate((50, 230, 410)):
+            cell = f"{rng.choice(_WORDS)} {rng.randint(1, 20)}y" if column else rng.choice(_WORDS).title()
+            ops.append(f"BT {font} 10 Tf {x} {y - 14 * row} Td {show(cell)} Tj ET")
+    return "\n".join(ops)
+
+
+def make_pdf(rng, pages, table_rows=0, cid_from=None):
+    """
+    A simple multi-page PDF with a Helvetica text layer; from page index
+    cid_from on, the text is set in a CID font without a ToUnicode map
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * page} 0 R" for page in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+    font = 3 + 2 * pages
+    for page in range(pages):
+        rows = table_rows if page == 0 or page % 5 == 0 else 0
+        if cid_from is not None and page >= cid_from:
+            stream = _pdf_page(rng, page, rows, "/F2", _cid_string)
+            fonts = f"/F2 {font + 1} 0 R"
+        else:
+            stream = _pdf_page(rng, page, rows)
+            fonts = f"/F1 {font} 0 R"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << {fonts} >> >> /Contents {4 + 2 * page} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    if cid_from is not None:
+        objects.append(
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /Helvetica /Encoding /Identity-H "
+            f"/DescendantFonts [{font + 2} 0 R] >>"
+        )
+        objects.append(
+            "<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Helvetica "
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            f"/FontDescriptor {font + 3} 0 R /DW 500 >>"
+        )
+        objects.append(
+            "<< /Type /FontDescriptor /FontName /Helvetica /Flags 32 /FontBBox [0 -200 1000 900] "
+            "/ItalicAngle 0 /Ascent 900 /Descent -200 /CapHeight 700 /StemV 80 >>"
+        )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/header1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+_DOCX_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rIdHeader1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" '
+    'Target="header1.xml"/></Relationships>'
+)
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _w_paragraph(text):
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{text}</w:t></w:r></w:p>"
+
+
+def make_docx(rng, paragraphs, table_rows=0):
+    """A .docx with a page header, body paragraphs and optionally a table in the middle"""
+    body = [_w_paragraph(_sentence(rng, 14)) for _ in range(paragraphs // 2)]
+    if table_rows:
+        rows = "".join(
+            "<w:tr>" + "".join(
+                f"<w:tc>{_w_paragraph(rng.choice(_WORDS).title() if column == 0 else _sentence(rng, 4))}</w:tc>"
+                for column in range(3)
+            ) + "</w:tr>"
+            for _ in range(table_rows)
+        )
+        body.append(f"<w:tbl>{rows}</w:tbl>")
+    body.extend(_w_paragraph(_sentence(rng, 14)) for _ in range(paragraphs - paragraphs // 2))
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {_W_NS}><w:body>'
+        + "".join(body)
+        + '<w:sectPr xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<w:headerReference w:type="default" r:id="rIdHeader1"/></w:sectPr></w:body></w:document>'
+    )
+    header = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:hdr {_W_NS}>'
+        + _w_paragraph("Jane Candidate | jane.candidate@example.com | +1 555 0100")
+        + "</w:hdr>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _DOCX_RELS)
+        archive.writestr("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS)
+        archive.writestr("word/document.xml", document)
+        archive.writestr("word/header1.xml", header)
+    return out.getvalue()
+
+
+def make_txt(rng, lines, _table_rows=0):
+    return "\n".join(_sentence(rng, 12) for _ in range(lines)).encode("utf-8")
+
+
+_GENERATORS = {"pdf": make_pdf, "docx": make_docx, "txt": make_txt}
+
+
+def generate_corpus(directory=BENCH_CORPUS_DIR, regenerate=False):
+    """Write the corpus files that are missing (all of them with regenerate); returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, (fmt, name, size, table_rows, *options) in enumerate(CORPUS):
+        path = os.path.join(directory, f"{name}.{fmt}")
+        if regenerate or not os.path.exists(path):
+            # One seed per file, so adding a file does not change the others
+            rng = random.Random(BENCH_SEED + index)
+            with open(path, "wb") as f:
+                f.write(_GENERATORS[fmt](rng, size, table_rows, **(options[0] if options else {})))
+        paths.append((fmt, path))
+    return paths
+
+
+# --- backends ------------------------------------------------------------
+
+def _python_docx(f):
+    import docx
+    return "\n".join(paragraph.text for paragraph in docx.Document(f).paragraphs)
+
+
+def _decode(f):
+    return f.read().decode("utf-8", errors="ignore")
+
+
+# Raw backends read the whole document; "pipeline" is what the API runs, with its page and character limits
+BACKENDS = {
+    "pdf": {
+        "pypdf2": lambda f: "\n".join(iter_pypdf_pages(f, 0)),
+        "pdfminer": lambda f: "".join(iter_pdfminer_pages(f, 0)),
+        "tiered": lambda f: "\n".join(iter_pdf_pages(f, 0)),
+    },
+    "docx": {
+        "python-docx": _python_docx,
+        "iterparse": lambda f: "".join(iter_docx_text(f)),
+    },
+    "txt": {
+        "decode": _decode,
+    },
+}
+
+
+def _backends_for(fmt):
+    backends = dict(BACKENDS[fmt])
+    content_type = CONTENT_TYPES[fmt]
+    backends["pipeline"] = lambda f: extract_text(f.read(), content_type)
+    return backends
+
+
+# --- measurement ---------------------------------------------------------
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _max_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _preload():
+    # Import the parsers up front, so their import cost is not counted as extraction memory
+    import docx  # noqa: F401
+    import lxml.etree  # noqa: F401
+    import pdfminer.high_level  # noqa: F401
+    import pdfminer.layout  # noqa: F401
+    import PyPDF2  # noqa: F401
+
+
+def _peak_rss_growth(fmt, backend_name, path):
+    """Runs in a fresh process: bytes the peak RSS grows by while extracting one document"""
+    _preload()
+    backend = _backends_for(fmt)[backend_name]
+    with open(path, "rb") as f:
+        content = f.read()
+    before = _max_rss()
+    backend(io.BytesIO(content))
+    return _max_rss() - before
+
+
+def measure(fmt, backend_name, path, content, repeat):
+    """(latencies in seconds, peak RSS growth in bytes, characters) for one backend on one document"""
+    backend = _backends_for(fmt)[backend_name]
+    latencies = []
+    chars = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chars = len(backend(io.BytesIO(content)))
+        latencies.append(time.perf_counter() - started)
+    # Memory in its own process: ru_maxrss only ever goes up, so this one needs a clean start
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        peak = pool.submit(_peak_rss_growth, fmt, backend_name, path).result()
+    return latencies, peak, chars
+
+
+def run_benchmark(paths, repeat=3, formats=None, backends=None):
+    """Run every backend over the corpus; returns one result dict per (format, backend)"""
+    results = []
+    for fmt in ("pdf", "docx", "txt"):
+        if formats and fmt not in formats:
+            continue
+        documents = [(path, open(path, "rb").read()) for file_fmt, path in paths if file_fmt == fmt]
+        for backend_name in _backends_for(fmt):
+            if backends and backend_name not in backends:
+                continue
+            latencies, peaks, chars, errors = [], [], 0, 0
+            total_bytes = sum(len(content) for _, content in documents)
+            for path, content in documents:
+                try:
+                    doc_latencies, peak, doc_chars = measure(fmt, backend_name, path, content, repeat)
+                except Exception as exc:
+                    print(f"{backend_name} failed on {path}: {type(exc).__name__}: {exc}", file=sys.stderr)
+                    errors += 1
+                    continue
+                # One latency per document: the median of its repeats
+                latencies.append(statistics.median(doc_latencies))
+                peaks.append(peak)
+                chars += doc_chars
+            elapsed = sum(latencies)
+            results.append({
+                "format": fmt,
+                "backend": backend_name,
+                "documents": len(latencies),
+                "errors": errors,
+                "mb_per_s": round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0,
+                "docs_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0,
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 1) if latencies else None,
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 1) if latencies else None,
+                "peak_rss_kb": round(max(peaks) / 1024) if peaks else None,
+                "chars": chars,
+            })
+    return results
+
+
+_COLUMNS = ("format", "backend", "documents", "errors", "mb_per_s", "docs_per_s", "p50_ms", "p95_ms",
+            "peak_rss_kb", "chars")
+
+
+def format_table(results, baseline=None):
+    """Plain-text table; with a baseline, p50/p95 get the change in percent"""
+    previous = {(row["format"], row["backend"]): row for row in baseline or ()}
+    rows = []
+    for result in results:
+        row = [str(result[column]) for column in _COLUMNS]
+        before = previous.get((result["format"], result["backend"]))
+        if before:
+            for column in ("p50_ms", "p95_ms"):
+                if before.get(column) and result[column] is not None:
+                    change = (result[column] - before[column]) / before[column] * 100
+                    row[_COLUMNS.index(column)] += f" ({change:+.0f}%)"
+        rows.append(row)
+    widths = [max(len(column), *(len(row[index]) for row in rows)) for index, column in enumerate(_COLUMNS)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(_COLUMNS, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark document text extraction backends")
+    parser.add_argument("--corpus", default=BENCH_CORPUS_DIR, help="directory of the generated corpus")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the corpus files")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per document (median is used)")
+    parser.add_argument("--format", action="append", dest="formats", choices=("pdf", "docx", "txt"),
+                        help="only benchmark this format; repeat for several")
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="only run this backend (e.g. pdfminer, pipeline); repeat for several")
+    parser.add_argument("--save", help="write the results as JSON, for --compare later")
+    parser.add_argument("--compare", help="JSON from an earlier --save to show latency changes against")
+    args = parser.parse_args(argv)
+
+    paths = generate_corpus(args.corpus, args.regenerate)
+    results = run_benchmark(paths, max(1, args.repeat), args.formats, args.backends)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print(format_table(results, baseline))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Fast JSON rendering for list endpoints.
+
+FastAPI's default path runs every returned dict through jsonable_encoder and
+then json.dumps; for a page of a few hundred candidates that costs about as
+much as the query. Endpoints here render once with orjson (falling back to
+the standard library if it is not installed) and return the bytes directly,
+and the read cache can keep those bytes so repeat polls skip encoding too.
+"""
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def render_json(value):
+    """Serialize value to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Response whose content is either pre-rendered JSON bytes or a value to render"""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return render_json(content)
@@ -0,0 +1,80 @@
+"""
+Conditional GET support: ETag / Last-Modified validators and 304 responses.
+
+List endpoints derive their ETag from the table_versions counter plus the
+query string, so a poll that finds nothing changed is answered with a 304
+after a single primary-key read - no query, no encoding, no body.
+
+Last-Modified is sent for information only on those endpoints and
+If-Modified-Since is not honoured there: table_versions.updated_at has
+one-second resolution, so a write in the same second as a poll would be
+missed. The version counter in the ETag has no such gap.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi.responses import Response
+
+
+def make_etag(*parts):
+    """Strong ETag from the values that determine a response body"""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def body_etag(body):
+    """Strong ETag from rendered response bytes, for data without a version counter"""
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def http_date(timestamp):
+    """Format a SQLite 'YYYY-MM-DD HH:MM:SS' UTC timestamp as an HTTP date, or None"""
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return format_datetime(moment, usegmt=True)
+
+
+def validator_headers(etag, last_modified=None):
+    """Headers that let clients revalidate instead of re-downloading"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def _etag_listed(header, etag):
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """True when the request's validators show the client already has this representation"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return _etag_listed(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified_response(headers):
+    return Response(status_code=304, headers=headers)
@@ -3,7 +3,6 @@ from typing import List
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response, HTMLResponse
 import uvicorn
-import sqlite3
 import json
 import os
 import pandas as pd
@@ -21,6 +20,9 @@ import requests
 import base64
 import io
 import re
+from repository import CandidateRepository, JobDescriptionRepository, create_schema, read_connection, write
+from analytics_store import read_dashboard
+from candidate_store import fetch_candidates, fetch_emailable_candidates, insert_candidates, to_candidate_row
 
 # Load environment variables
 load_dotenv("credentials.env", override=True)
@@ -37,6 +39,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def prepare_database():
+    create_schema()
+
+job_description_repo = JobDescriptionRepository()
+candidate_repo = CandidateRepository()
+
 # Environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
@@ -55,10 +64,6 @@ HR_EMAIL = os.getenv("HR_EMAIL")
 YOUR_EMAIL = os.getenv("YOUR_EMAIL")
 YOUR_EMAIL_PASSWORD = os.getenv("YOUR_EMAIL_PASSWORD")
 
-# Database connection
-def get_connection():
-    return sqlite3.connect('candidates.db', check_same_thread=False)
-
 # Phone number formatting function
 def format_phone_number(phone):
     """Clean and format phone number for Twilio"""
@@ -90,11 +95,8 @@ async def root():
 
 @app.get("/candidates")
 async def get_candidates():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM candidates")
-    candidates = cursor.fetchall()
-    conn.close()
+    with read_connection() as conn:
+        candidates = fetch_candidates(conn)
     
     result = []
     for candidate in candidates:
@@ -118,72 +120,15 @@ async def get_candidates():
 async def get_analytics_dashboard():
     """Get analytics dashboard data"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Get candidate statistics
-        cursor.execute("SELECT COUNT(*) FROM candidates")
-        total_candidates = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM candidates WHERE score >= 70")
-        qualified_candidates = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM candidates WHERE status = 'Interview Scheduled'")
-        scheduled_interviews = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM job_descriptions")
-        total_job_descriptions = cursor.fetchone()[0]
-        
-        # Get recent candidates
-        cursor.execute("SELECT name, score, status, email FROM candidates ORDER BY id DESC LIMIT 10")
-        recent_candidates = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "total_candidates": total_candidates,
-            "qualified_candidates": qualified_candidates,
-            "scheduled_interviews": scheduled_interviews,
-            "total_job_descriptions": total_job_descriptions,
-            "recent_candidates": [
-                {
-                    "name": candidate[0],
-                    "score": candidate[1],
-                    "status": candidate[2],
-                    "email": candidate[3]
-                } for candidate in recent_candidates
-            ]
-        }
+        with read_connection() as conn:
+            return read_dashboard(conn)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/job-descriptions")
 async def get_job_descriptions():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM job_descriptions")
-    job_descriptions = cursor.fetchall()
-    conn.close()
-    
-    result = []
-    for jd in job_descriptions:
-        result.append({
-            "id": jd[0],
-            "title": jd[1],
-            "company": jd[2],
-            "location": jd[3],
-            "type": jd[4],
-            "salary": jd[5],
-            "experience": jd[6],
-            "description": jd[7],
-            "requirements": jd[8],
-            "responsibilities": jd[9],
-            "skills": jd[10],
-            "benefits": jd[11]
-        })
-    
-    return result
+    return job_description_repo.list()
 
 # Resume and JD parsing endpoints
 def extract_text_from_file(file_content, file_type):
@@ -246,24 +191,9 @@ async def parse_resume(file: UploadFile = File(...)):
             candidate_data = json.loads(json_match.group())
             
             # Save to database
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO candidates (name, email, phone_number, skills, experience, education, linkedin, score, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                candidate_data.get('name', ''),
-                candidate_data.get('email', ''),
-                candidate_data.get('phone', ''),
-                candidate_data.get('skills', ''),
-                candidate_data.get('experience', ''),
-                candidate_data.get('education', ''),
-                candidate_data.get('linkedin', ''),
-                0,  # Default score
-                'New'  # Default status
-            ))
-            conn.commit()
-            conn.close()
+            write(insert_candidates, [
+                to_candidate_row(dict(candidate_data, score=0, status='New'))  # Default score and status
+            ])
             
             return {"success": True, "candidate": candidate_data}
         else:
@@ -324,33 +254,25 @@ async def parse_job_description(file: UploadFile = File(...)):
             print(f"JD Data: {jd_data}")
             
             # Save to database
-            conn = get_connection()
-            cursor = conn.cursor()
-            
             # Convert lists to strings for database storage
             def list_to_string(value):
                 if isinstance(value, list):
                     return ', '.join(str(item) for item in value)
                 return str(value) if value is not None else ''
             
-            cursor.execute("""
-                INSERT INTO job_descriptions (title, company, location, type, salary, experience, description, requirements, responsibilities, skills, benefits)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                jd_data.get('title', ''),
-                jd_data.get('company', ''),
-                jd_data.get('location', ''),
-                jd_data.get('type', ''),
-                jd_data.get('salary', ''),
-                jd_data.get('experience', ''),
-                jd_data.get('description', ''),
-                list_to_string(jd_data.get('requirements', '')),
-                list_to_string(jd_data.get('responsibilities', '')),
-                list_to_string(jd_data.get('skills', '')),
-                list_to_string(jd_data.get('benefits', ''))
-            ))
-            conn.commit()
-            conn.close()
+            job_description_repo.add({
+                'title': jd_data.get('title', ''),
+                'company': jd_data.get('company', ''),
+                'location': jd_data.get('location', ''),
+                'type': jd_data.get('type', ''),
+                'salary': jd_data.get('salary', ''),
+                'experience': jd_data.get('experience', ''),
+                'description': jd_data.get('description', ''),
+                'requirements': list_to_string(jd_data.get('requirements', '')),
+                'responsibilities': list_to_string(jd_data.get('responsibilities', '')),
+                'skills': list_to_string(jd_data.get('skills', '')),
+                'benefits': list_to_string(jd_data.get('benefits', ''))
+            })
             
             return {"success": True, "job_description": jd_data}
         else:
@@ -421,15 +343,11 @@ async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: s
         # Get job description text if job_id is provided
         job_desc_text = ""
         if job_id:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM job_descriptions WHERE id = ?", (job_id,))
-            jd_row = cursor.fetchone()
-            conn.close()
+            jd = job_description_repo.get(job_id)
             
-            if jd_row:
+            if jd:
                 # Combine job description fields into text
-                job_desc_text = f"Title: {jd_row[1]}\nCompany: {jd_row[2]}\nLocation: {jd_row[3]}\nType: {jd_row[4]}\nSalary: {jd_row[5]}\nExperience: {jd_row[6]}\nDescription: {jd_row[7]}\nRequirements: {jd_row[8]}\nResponsibilities: {jd_row[9]}\nSkills: {jd_row[10]}\nBenefits: {jd_row[11]}"
+                job_desc_text = f"Title: {jd['title']}\nCompany: {jd['company']}\nLocation: {jd['location']}\nType: {jd['type']}\nSalary: {jd['salary']}\nExperience: {jd['experience']}\nDescription: {jd['description']}\nRequirements: {jd['requirements']}\nResponsibilities: {jd['responsibilities']}\nSkills: {jd['skills']}\nBenefits: {jd['benefits']}"
         
         for file in files:
             try:
@@ -446,25 +364,7 @@ async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: s
                         candidate[key] = '' if key != 'score' else 0
                 
                 # Save to database
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO candidates (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    candidate.get('name', ''),
-                    candidate.get('skills', ''),
-                    candidate.get('education', ''),
-                    candidate.get('certifications', ''),
-                    candidate.get('experience', ''),
-                    candidate.get('email', ''),
-                    candidate.get('phone number', ''),
-                    candidate.get('linkedin', ''),
-                    candidate.get('score', 0),
-                    candidate.get('status', 'New')
-                ))
-                conn.commit()
-                conn.close()
+                write(insert_candidates, [to_candidate_row(candidate)])
                 
                 results.append({
                     "success": True,
@@ -730,15 +630,10 @@ async def bulk_prescreening_process(data: dict):
             raise HTTPException(status_code=400, detail="No candidates selected")
         
         # Get candidates
-        conn = get_connection()
-        cursor = conn.cursor()
-        placeholders = ','.join(['?' for _ in candidate_ids])
-        cursor.execute(f"""
-            SELECT id, name, email, phone_number, score, skills, experience, education
-            FROM candidates 
-            WHERE id IN ({placeholders})
-        """, candidate_ids)
-        candidates = cursor.fetchall()
+        with read_connection() as conn:
+            candidates = fetch_candidates(
+                conn, ("id", "name", "email", "phone_number", "score", "skills", "experience", "education"), candidate_ids
+            )
         
         results = []
         successful_calls = 0
@@ -811,8 +706,6 @@ async def bulk_prescreening_process(data: dict):
                 })
                 failed_calls += 1
         
-        conn.close()
-        
         return {
             "success": True,
             "message": f"Prescreening completed for {len(candidate_ids)} candidates",
@@ -992,18 +885,14 @@ async def process_call_results(call_sid: str):
         responses = conversation.get("responses", [])
         
         # Get candidate info from database
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM candidates WHERE name = ?", (prospect_name,))
-        candidate_row = cursor.fetchone()
-        conn.close()
+        candidate = candidate_repo.get_by_name(prospect_name)
         
-        if not candidate_row:
+        if not candidate:
             print(f"No candidate found for {prospect_name}")
             return
         
         # Extract candidate info
-        candidate_id, name, skills, education, certifications, experience, email, phone_number, linkedin, score, status = candidate_row
+        candidate_id, name, email = candidate["id"], candidate["name"], candidate["email"]
         
         # Score the call based on responses
         call_score = await score_call_responses(responses)
@@ -1012,11 +901,7 @@ async def process_call_results(call_sid: str):
         new_status = "Interview Scheduled" if call_score >= 7 else "Not Scheduled"
         
         # Update database
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE candidates SET status = ? WHERE id = ?", (new_status, candidate_id))
-        conn.commit()
-        conn.close()
+        candidate_repo.update_status(candidate_id, new_status)
         
         # Send emails
         if email:
@@ -1122,16 +1007,9 @@ HR Management System
 async def auto_process_candidates():
     """Automatically process candidates after scoring - send emails and HR report"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         # Get all candidates with scores
-        cursor.execute("""
-            SELECT name, email, score, status FROM candidates 
-            WHERE score IS NOT NULL AND email IS NOT NULL AND email != ''
-        """)
-        candidates = cursor.fetchall()
-        conn.close()
+        with read_connection() as conn:
+            candidates = fetch_emailable_candidates(conn)
         
         if not candidates:
             return {"success": False, "message": "No candidates found for processing"}
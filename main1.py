@@ -1,15 +1,13 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
-from typing import List
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Query
+from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response, HTMLResponse
+from fastapi.responses import JSONResponse, Response, HTMLResponse, StreamingResponse
 import uvicorn
-import sqlite3
+import asyncio
 import json
 import os
 import pandas as pd
 from datetime import datetime
-from pdfminer.high_level import extract_text
-import docx
 from openai import OpenAI
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Hangup
@@ -21,6 +19,31 @@ import requests
 import base64
 import io
 import re
+from db_async import run_read, run_sync, run_write, shutdown as shutdown_db
+from read_cache import read_cache, table_version_info
+from http_cache import body_etag, http_date, is_not_modified, make_etag, not_modified_response, validator_headers
+from fast_json import JSONBytesResponse, render_json
+from candidate_csv import ON_CONFLICT_MODES, import_candidates_csv, iter_candidates_csv
+from candidate_archive import ARCHIVE_AFTER_DAYS, ARCHIVE_STATUSES, archive_candidates
+from text_extraction import (
+    ExtractionTimeout, chars_for_tokens, extract_text_async, extraction_pool, shutdown_extraction
+)
+from text_cache import text_cache
+from upload_spool import UPLOAD_WINDOW, spool_upload
+from text_preprocess import load_tokenizer, prepare_prompt_text
+from archive_upload import ARCHIVE_WINDOW, iter_archive_members
+from repository import (
+    JOB_DESCRIPTION_FIELDS, SQLITE_BACKEND, CandidateRepository, JobDescriptionRepository, create_schema,
+    dispose_engine, insert_job_description, update_candidate_status
+)
+from analytics_store import (
+    DEFAULT_ACTIVITY_LIMIT, DEFAULT_SKILLS_LIMIT, read_dashboard, read_recent_activity, read_score_distribution,
+    read_status_breakdown, read_top_skills, read_trends
+)
+from candidate_store import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_candidates, fetch_emailable_candidates, insert_candidates,
+    query_candidates_page, search_candidates, to_candidate_row
+)
 
 # Load environment variables
 load_dotenv("credentials.env", override=True)
@@ -37,10 +60,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Job descriptions and call-result lookups go through the SQLAlchemy repositories
+job_description_repo = JobDescriptionRepository()
+candidate_repo = CandidateRepository()
+
+@app.on_event("startup")
+def prepare_database():
+    # Runs migrations.py on the database file the repositories use
+    create_schema()
+
+@app.on_event("startup")
+async def load_prompt_tokenizer():
+    # Loading may download the encoding file; prompts use estimated token counts until it is done
+    asyncio.get_running_loop().run_in_executor(None, load_tokenizer)
+
+@app.on_event("shutdown")
+def close_database():
+    shutdown_extraction()
+    shutdown_db()
+    dispose_engine()
+
 # Environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Prompt tokens given to uploaded document text; extraction stops once they are filled
+RESUME_TEXT_MAX_TOKENS = int(os.getenv("RESUME_TEXT_MAX_TOKENS", "3000"))
+JD_TEXT_MAX_TOKENS = int(os.getenv("JD_TEXT_MAX_TOKENS", "3000"))
+
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
@@ -95,10 +142,6 @@ HR_EMAIL = os.getenv("HR_EMAIL")
 YOUR_EMAIL = os.getenv("YOUR_EMAIL")
 YOUR_EMAIL_PASSWORD = os.getenv("YOUR_EMAIL_PASSWORD")
 
-# Database connection
-def get_connection():
-    return sqlite3.connect('candidates.db', check_same_thread=False)
-
 # Phone number formatting function
 def format_phone_number(phone):
     """Clean and format phone number for Twilio"""
@@ -128,123 +171,210 @@ async def root():
     return {"message": "HR Management System API", "status": "running"}
 
 
+def cached_candidates_page(conn, version, **params):
+    """Rendered JSON of a query_candidates_page result, served from read_cache until candidates changes"""
+    key = ("candidates_page",) + tuple(sorted(params.items()))
+
+    def load():
+        page = query_candidates_page(conn, **params)
+        return render_json(dict(page, limit=params["limit"], sort=params["sort"]))
+
+    return read_cache.get_or_load(key, version, load)
+
+def cached_job_descriptions(version):
+    """Rendered JSON of every job description, served from read_cache until the table changes"""
+    return read_cache.get_or_load(
+        ("job_descriptions",), version, lambda: render_json(job_description_repo.list())
+    )
+
+def cached_job_description(job_id):
+    """One job description by integer id, served from read_cache until the table changes"""
+    return read_cache.get_or_load(
+        ("job_description", job_id), job_description_repo.version(), lambda: job_description_repo.get(job_id)
+    )
+
 @app.get("/candidates")
-async def get_candidates():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM candidates")
-    candidates = cursor.fetchall()
-    conn.close()
-    
-    result = []
-    for candidate in candidates:
-        result.append({
-            "id": candidate[0],
-            "name": candidate[1],
-            "skills": candidate[2],
-            "education": candidate[3],
-            "certifications": candidate[4],
-            "experience": candidate[5],
-            "email": candidate[6],
-            "phone_number": candidate[7],
-            "linkedin": candidate[8],
-            "score": candidate[9],
-            "status": candidate[10]
-        })
-    
-    return result
+async def get_candidates(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "id",
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    skills: Optional[str] = None,
+    skills_mode: str = Query("all", pattern="^(all|any)$"),
+    include_archived: bool = False,
+):
+    """Get one page of candidates; pass next_cursor back as cursor for the next page"""
+    version, updated_at = await run_read(table_version_info, "candidates")
+    headers = validator_headers(make_etag("candidates", version, request.url.query), http_date(updated_at))
+    # ETag only: Last-Modified has one-second resolution, so If-Modified-Since
+    # would 304 a poll that lands in the same second as a write
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    try:
+        body = await run_read(
+            cached_candidates_page, version, limit=limit, cursor=cursor, fields=fields, sort=sort,
+            status=status, min_score=min_score, max_score=max_score,
+            skills=skills, skills_mode=skills_mode, include_archived=include_archived
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONBytesResponse(body, headers=headers)
+
+@app.post("/candidates/import")
+async def import_candidates(file: UploadFile = File(...), on_conflict: str = Form("update")):
+    """Stream a candidates CSV into the database in chunked transactions"""
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise HTTPException(status_code=400, detail=f"on_conflict must be one of {', '.join(ON_CONFLICT_MODES)}")
+
+    def load():
+        text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            return import_candidates_csv(text, on_conflict)
+        finally:
+            text.detach()  # leave closing the upload to FastAPI
+
+    try:
+        return await run_sync(load)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/candidates/export")
+async def export_candidates(include_archived: bool = False):
+    """Stream every candidate as CSV"""
+    return StreamingResponse(
+        iter_candidates_csv(include_archived=include_archived),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="candidates.csv"'}
+    )
+
+@app.post("/candidates/archive")
+async def archive_candidates_endpoint(
+    older_than_days: Optional[int] = Query(ARCHIVE_AFTER_DAYS, ge=1),
+    statuses: Optional[str] = None
+):
+    """Move old or closed candidates into the archive; statuses is comma-separated"""
+    status_list = [s.strip() for s in statuses.split(",") if s.strip()] if statuses is not None else ARCHIVE_STATUSES
+    try:
+        archived = await run_sync(archive_candidates, older_than_days, status_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"archived": archived}
+
+@app.get("/candidates/search")
+async def search_candidates_endpoint(
+    q: str,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    skills: Optional[str] = None,
+    skills_mode: str = Query("all", pattern="^(all|any)$"),
+):
+    """Full-text search over candidates, best matches first"""
+    try:
+        page = await run_read(
+            search_candidates, q, limit=limit, cursor=cursor, fields=fields,
+            status=status, min_score=min_score, max_score=max_score,
+            skills=skills, skills_mode=skills_mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page["query"] = q
+    page["limit"] = limit
+    return JSONBytesResponse(page)
 
 @app.get("/analytics/dashboard")
 async def get_analytics_dashboard():
     """Get analytics dashboard data"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Get candidate statistics
-        cursor.execute("SELECT COUNT(*) FROM candidates")
-        total_candidates = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM candidates WHERE score >= 70")
-        qualified_candidates = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM candidates WHERE status = 'Interview Scheduled'")
-        scheduled_interviews = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM job_descriptions")
-        total_job_descriptions = cursor.fetchone()[0]
-        
-        # Get recent candidates
-        cursor.execute("SELECT name, score, status, email FROM candidates ORDER BY id DESC LIMIT 10")
-        recent_candidates = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "total_candidates": total_candidates,
-            "qualified_candidates": qualified_candidates,
-            "scheduled_interviews": scheduled_interviews,
-            "total_job_descriptions": total_job_descriptions,
-            "recent_candidates": [
-                {
-                    "name": candidate[0],
-                    "score": candidate[1],
-                    "status": candidate[2],
-                    "email": candidate[3]
-                } for candidate in recent_candidates
-            ]
-        }
-        
+        return await run_read(read_dashboard)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# range=N limits analytics to candidates added in the last N days
+ANALYTICS_MAX_RANGE_DAYS = 3650
+
+def require_rollups():
+    """The daily rollups are kept by SQLite triggers; there are none on a server database"""
+    if not SQLITE_BACKEND:
+        raise HTTPException(status_code=501, detail="Analytics rollups are only available on the SQLite database")
+
+@app.get("/analytics/trends")
+async def get_analytics_trends(
+    days: int = Query(30, alias="range", ge=1, le=ANALYTICS_MAX_RANGE_DAYS)
+):
+    """Daily candidates added, qualified and scheduled for interview"""
+    require_rollups()
+    return {"range": days, "trends": await run_read(read_trends, days)}
+
+@app.get("/analytics/scores")
+async def get_analytics_scores(
+    days: Optional[int] = Query(None, alias="range", ge=1, le=ANALYTICS_MAX_RANGE_DAYS)
+):
+    """Score distribution in 10-point buckets"""
+    require_rollups()
+    return {"range": days, "distribution": await run_read(read_score_distribution, days)}
+
+@app.get("/analytics/status")
+async def get_analytics_status(
+    days: Optional[int] = Query(None, alias="range", ge=1, le=ANALYTICS_MAX_RANGE_DAYS)
+):
+    """Candidate counts per status"""
+    require_rollups()
+    return {"range": days, "statuses": await run_read(read_status_breakdown, days)}
+
+@app.get("/analytics/skills")
+async def get_analytics_skills(
+    days: Optional[int] = Query(None, alias="range", ge=1, le=ANALYTICS_MAX_RANGE_DAYS),
+    limit: int = Query(DEFAULT_SKILLS_LIMIT, ge=1, le=100)
+):
+    """Most common candidate skills"""
+    require_rollups()
+    return {"range": days, "skills": await run_read(read_top_skills, days, limit)}
+
+@app.get("/analytics/activity")
+async def get_analytics_activity(
+    limit: int = Query(DEFAULT_ACTIVITY_LIMIT, ge=1, le=200)
+):
+    """Most recent candidate events"""
+    require_rollups()
+    return {"activity": await run_read(read_recent_activity, limit)}
+
 @app.get("/job-descriptions")
-async def get_job_descriptions():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM job_descriptions")
-    job_descriptions = cursor.fetchall()
-    conn.close()
-    
-    result = []
-    for jd in job_descriptions:
-        result.append({
-            "id": jd[0],
-            "title": jd[1],
-            "company": jd[2],
-            "location": jd[3],
-            "type": jd[4],
-            "salary": jd[5],
-            "experience": jd[6],
-            "description": jd[7],
-            "requirements": jd[8],
-            "responsibilities": jd[9],
-            "skills": jd[10],
-            "benefits": jd[11]
-        })
-    
-    return result
+async def get_job_descriptions(request: Request):
+    version, updated_at = await run_sync(job_description_repo.version_info)
+    headers = validator_headers(make_etag("job_descriptions", version), http_date(updated_at))
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    return JSONBytesResponse(await run_sync(cached_job_descriptions, version), headers=headers)
 
 # Resume and JD parsing endpoints
-def extract_text_from_file(file_content, file_type):
-    """Extract text from uploaded file"""
+async def extract_text_from_file(source, file_type, digest=None, max_tokens=None):
+    """Extract text from uploaded file (bytes or spooled file path) in the extraction process pool"""
+    max_chars = chars_for_tokens(max_tokens) if max_tokens else None
     try:
-        if file_type == "application/pdf":
-            return extract_text(io.BytesIO(file_content))
-        elif file_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-            doc = docx.Document(io.BytesIO(file_content))
-            return "\n".join([para.text for para in doc.paragraphs])
-        else:
-            return file_content.decode("utf-8", errors="ignore")
+        return await extract_text_async(source, file_type, digest=digest, max_chars=max_chars)
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error extracting text: {str(e)}")
 
+async def extract_upload_text(file: UploadFile, max_tokens=None):
+    """Spool an upload, extract at most about max_tokens tokens of its text, then release it"""
+    with await spool_upload(file) as upload:
+        return await extract_text_from_file(upload.source, upload.content_type, upload.digest, max_tokens)
+
 @app.post("/parse-resume")
 async def parse_resume(file: UploadFile = File(...)):
     """Parse resume and extract candidate information"""
     try:
-        file_content = await file.read()
-        resume_text = extract_text_from_file(file_content, file.content_type)
+        resume_text = await extract_upload_text(file, RESUME_TEXT_MAX_TOKENS)
         
         # Use OpenAI to extract candidate information
         prompt = """
@@ -264,7 +394,7 @@ async def parse_resume(file: UploadFile = File(...)):
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an expert at extracting information from resumes. Return only valid JSON."},
-                {"role": "user", "content": f"{prompt}\n\nResume:\n{resume_text}"}
+                {"role": "user", "content": f"{prompt}\n\nResume:\n{prepare_prompt_text(resume_text, RESUME_TEXT_MAX_TOKENS)}"}
             ],
             max_tokens=100,
             temperature=0.7
@@ -286,24 +416,9 @@ async def parse_resume(file: UploadFile = File(...)):
             candidate_data = json.loads(json_match.group())
             
             # Save to database
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO candidates (name, email, phone_number, skills, experience, education, linkedin, score, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                candidate_data.get('name', ''),
-                candidate_data.get('email', ''),
-                candidate_data.get('phone', ''),
-                candidate_data.get('skills', ''),
-                candidate_data.get('experience', ''),
-                candidate_data.get('education', ''),
-                candidate_data.get('linkedin', ''),
-                0,  # Default score
-                'New'  # Default status
-            ))
-            conn.commit()
-            conn.close()
+            await run_write(insert_candidates, [
+                to_candidate_row(dict(candidate_data, score=0, status='New'))  # Default score and status
+            ])
             
             return {"success": True, "candidate": candidate_data}
         else:
@@ -316,8 +431,7 @@ async def parse_resume(file: UploadFile = File(...)):
 async def parse_job_description(file: UploadFile = File(...)):
     """Parse job description and extract key information"""
     try:
-        file_content = await file.read()
-        jd_text = extract_text_from_file(file_content, file.content_type)
+        jd_text = await extract_upload_text(file, JD_TEXT_MAX_TOKENS)
         
         # Use OpenAI to extract job description information
         prompt = """
@@ -341,7 +455,7 @@ async def parse_job_description(file: UploadFile = File(...)):
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an expert at extracting information from job descriptions. Return only valid JSON."},
-                {"role": "user", "content": f"{prompt}\n\nJob Description:\n{jd_text}"}
+                {"role": "user", "content": f"{prompt}\n\nJob Description:\n{prepare_prompt_text(jd_text, JD_TEXT_MAX_TOKENS)}"}
             ],
             max_tokens=400,
             temperature=0.7
@@ -364,33 +478,15 @@ async def parse_job_description(file: UploadFile = File(...)):
             print(f"JD Data: {jd_data}")
             
             # Save to database
-            conn = get_connection()
-            cursor = conn.cursor()
-            
             # Convert lists to strings for database storage
             def list_to_string(value):
                 if isinstance(value, list):
                     return ', '.join(str(item) for item in value)
                 return str(value) if value is not None else ''
             
-            cursor.execute("""
-                INSERT INTO job_descriptions (title, company, location, type, salary, experience, description, requirements, responsibilities, skills, benefits)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                jd_data.get('title', ''),
-                jd_data.get('company', ''),
-                jd_data.get('location', ''),
-                jd_data.get('type', ''),
-                jd_data.get('salary', ''),
-                jd_data.get('experience', ''),
-                jd_data.get('description', ''),
-                list_to_string(jd_data.get('requirements', '')),
-                list_to_string(jd_data.get('responsibilities', '')),
-                list_to_string(jd_data.get('skills', '')),
-                list_to_string(jd_data.get('benefits', ''))
-            ))
-            conn.commit()
-            conn.close()
+            await run_write(insert_job_description, {
+                field: list_to_string(jd_data.get(field, '')) for field in JOB_DESCRIPTION_FIELDS
+            })
             
             return {"success": True, "job_description": jd_data}
         else:
@@ -401,8 +497,9 @@ async def parse_job_description(file: UploadFile = File(...)):
 
 def extract_and_score_candidate(resume_text, job_desc):
     """Extract and score candidate from resume text - copied from HR_app.py"""
-    job_desc_short = job_desc
-    resume_text_short = resume_text
+    # Whitespace, page furniture and repeated lines cost tokens on every candidate
+    job_desc_short = prepare_prompt_text(job_desc, JD_TEXT_MAX_TOKENS)
+    resume_text_short = prepare_prompt_text(resume_text, RESUME_TEXT_MAX_TOKENS)
     prompt = (
         "Given the following job description:\n"
         f"{job_desc_short}\n\n"
@@ -452,6 +549,27 @@ def extract_and_score_candidate(resume_text, job_desc):
         print(f"Error from OpenAI (candidate extraction/scoring): {e}")
         return {}
 
+async def job_description_text(job_id):
+    """A stored job description as prompt text, or '' when there is none"""
+    try:
+        job_id = int(job_id)
+    except (TypeError, ValueError):
+        # A missing or non-numeric id matches no job description
+        return ""
+    jd = await run_sync(cached_job_description, job_id)
+    if not jd:
+        return ""
+    # Combine job description fields into text
+    return "\n".join(f"{field.capitalize()}: {jd[field]}" for field in JOB_DESCRIPTION_FIELDS)
+
+def complete_candidate(candidate):
+    """Ensure all expected keys exist with default values (copied from HR_app.py)"""
+    expected_keys = ['name', 'skills', 'education', 'certifications', 'experience', 'email', 'phone number', 'linkedin', 'score', 'status']
+    for key in expected_keys:
+        if key not in candidate:
+            candidate[key] = '' if key != 'score' else 0
+    return candidate
+
 @app.post("/parse-and-score-resumes")
 async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: str = Form(None)):
     """Parse multiple resumes and score them against a job description - using HR_app.py logic"""
@@ -459,52 +577,28 @@ async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: s
         results = []
         
         # Get job description text if job_id is provided
-        job_desc_text = ""
-        if job_id:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM job_descriptions WHERE id = ?", (job_id,))
-            jd_row = cursor.fetchone()
-            conn.close()
-            
-            if jd_row:
-                # Combine job description fields into text
-                job_desc_text = f"Title: {jd_row[1]}\nCompany: {jd_row[2]}\nLocation: {jd_row[3]}\nType: {jd_row[4]}\nSalary: {jd_row[5]}\nExperience: {jd_row[6]}\nDescription: {jd_row[7]}\nRequirements: {jd_row[8]}\nResponsibilities: {jd_row[9]}\nSkills: {jd_row[10]}\nBenefits: {jd_row[11]}"
+        job_desc_text = await job_description_text(job_id)
+        
+        # Extract resumes in parallel, but only UPLOAD_WINDOW at a time so a big batch is never all in memory
+        window = asyncio.Semaphore(UPLOAD_WINDOW)
+        
+        async def extract_upload(file):
+            async with window:
+                return await extract_upload_text(file, RESUME_TEXT_MAX_TOKENS)
+        
+        extracted = await asyncio.gather(*(extract_upload(file) for file in files), return_exceptions=True)
         
-        for file in files:
+        new_rows = []
+        for file, resume_text in zip(files, extracted):
             try:
-                file_content = await file.read()
-                resume_text = extract_text_from_file(file_content, file.content_type)
+                if isinstance(resume_text, Exception):
+                    raise resume_text
                 
                 # Use the exact same logic as HR_app.py
-                candidate = extract_and_score_candidate(resume_text, job_desc_text)
+                candidate = complete_candidate(extract_and_score_candidate(resume_text, job_desc_text))
                 
-                # Ensure all expected keys exist with default values (copied from HR_app.py)
-                expected_keys = ['name', 'skills', 'education', 'certifications', 'experience', 'email', 'phone number', 'linkedin', 'score', 'status']
-                for key in expected_keys:
-                    if key not in candidate:
-                        candidate[key] = '' if key != 'score' else 0
-                
-                # Save to database
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO candidates (name, skills, education, certifications, experience, email, phone_number, linkedin, score, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    candidate.get('name', ''),
-                    candidate.get('skills', ''),
-                    candidate.get('education', ''),
-                    candidate.get('certifications', ''),
-                    candidate.get('experience', ''),
-                    candidate.get('email', ''),
-                    candidate.get('phone number', ''),
-                    candidate.get('linkedin', ''),
-                    candidate.get('score', 0),
-                    candidate.get('status', 'New')
-                ))
-                conn.commit()
-                conn.close()
+                # Queue for the batched database write below
+                new_rows.append(to_candidate_row(candidate))
                 
                 results.append({
                     "success": True,
@@ -520,6 +614,10 @@ async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: s
                     "filename": file.filename
                 })
         
+        # Save every parsed candidate in a single transaction
+        if new_rows:
+            await run_write(insert_candidates, new_rows)
+        
         # Auto-process only the newly parsed candidates (send emails and HR report)
         auto_process_result = None
         try:
@@ -587,6 +685,75 @@ async def parse_and_score_resumes(files: List[UploadFile] = File(...), job_id: s
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/parse-and-score-archive")
+async def parse_and_score_archive(file: UploadFile = File(...), job_id: str = Form(None)):
+    """Parse and score every resume in a ZIP or tar upload, ARCHIVE_WINDOW members at a time"""
+    job_desc_text = await job_description_text(job_id)
+    members = await asyncio.to_thread(iter_archive_members, file.file)
+    window = asyncio.Semaphore(ARCHIVE_WINDOW)
+    results = []
+    tasks = []
+
+    async def process(index, member):
+        try:
+            resume_text = await extract_text_from_file(member.content, member.content_type, max_tokens=RESUME_TEXT_MAX_TOKENS)
+            member.content = None  # the text is all that is needed from here on
+            # The OpenAI client blocks, so scoring runs in a thread; the window bounds concurrent calls
+            candidate = complete_candidate(await asyncio.to_thread(extract_and_score_candidate, resume_text, job_desc_text))
+            # Concurrent inserts share transactions in the write queue
+            await run_write(insert_candidates, [to_candidate_row(candidate)])
+            results[index] = {
+                "success": True,
+                "candidate": candidate,
+                "score": candidate.get('score', 0),
+                "filename": member.name
+            }
+        except Exception as e:
+            results[index] = {"success": False, "error": getattr(e, "detail", None) or str(e), "filename": member.name}
+        finally:
+            window.release()
+
+    try:
+        while True:
+            # Read the next member only when there is room for it, so memory stays bounded
+            await window.acquire()
+            try:
+                member = await asyncio.to_thread(next, members, None)
+            except BaseException:
+                window.release()
+                raise
+            if member is None:
+                window.release()
+                break
+            if member.error:
+                window.release()
+                results.append({"success": False, "error": member.error, "filename": member.name})
+                continue
+            results.append(None)
+            tasks.append(asyncio.create_task(process(len(results) - 1, member)))
+    except ValueError as e:
+        # Not an archive, or damaged before its first file
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise HTTPException(status_code=400, detail=f"Could not read archive: {e}")
+    finally:
+        members.close()
+    await asyncio.gather(*tasks)
+
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "results": results,
+        # Set when the archive is damaged part-way through; the results above were read before the damage
+        "error": members.error,
+        "summary": {
+            "members": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "truncated": members.truncated
+        }
+    }
+
 # Twilio call endpoints
 @app.post("/set-prospect")
 async def set_prospect(request: Request):
@@ -853,9 +1020,24 @@ async def generate_ai_response(call_sid: str, user_response: str, question_num:
         return random.choice(templates)
 
 @app.get("/conversations")
-async def get_conversations():
+async def get_conversations(request: Request):
     """Get all conversation data"""
-    return {"conversations": conversations}
+    # Conversations live in memory with no version counter, so the ETag hashes the rendered body
+    body = render_json({"conversations": conversations})
+    headers = validator_headers(body_etag(body))
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    return JSONBytesResponse(body, headers=headers)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the candidate and job-description read cache"""
+    return read_cache.stats()
+
+@app.get("/extraction/stats")
+async def get_extraction_stats():
+    """Counters of the document extraction pool and the extracted-text cache"""
+    return {"pool": extraction_pool.stats(), "cache": text_cache.stats()}
 
 @app.get("/performance-metrics")
 async def get_performance_metrics():
@@ -899,6 +1081,8 @@ async def get_performance_metrics():
     }
 
 # Prescreening workflow
+PRESCREEN_COLUMNS = ("id", "name", "email", "phone_number", "score", "skills", "experience", "education")
+
 @app.post("/prescreening/bulk-process")
 async def bulk_prescreening_process(data: dict):
     """Process prescreening calls for multiple candidates"""
@@ -910,15 +1094,7 @@ async def bulk_prescreening_process(data: dict):
             raise HTTPException(status_code=400, detail="No candidates selected")
         
         # Get candidates
-        conn = get_connection()
-        cursor = conn.cursor()
-        placeholders = ','.join(['?' for _ in candidate_ids])
-        cursor.execute(f"""
-            SELECT id, name, email, phone_number, score, skills, experience, education
-            FROM candidates 
-            WHERE id IN ({placeholders})
-        """, candidate_ids)
-        candidates = cursor.fetchall()
+        candidates = await run_read(fetch_candidates, PRESCREEN_COLUMNS, candidate_ids)
         
         results = []
         successful_calls = 0
@@ -991,8 +1167,6 @@ async def bulk_prescreening_process(data: dict):
                 })
                 failed_calls += 1
         
-        conn.close()
-        
         return {
             "success": True,
             "message": f"Prescreening completed for {len(candidate_ids)} candidates",
@@ -1172,18 +1346,14 @@ async def process_call_results(call_sid: str):
         responses = conversation.get("responses", [])
         
         # Get candidate info from database
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM candidates WHERE name = ?", (prospect_name,))
-        candidate_row = cursor.fetchone()
-        conn.close()
+        candidate = await run_sync(candidate_repo.get_by_name, prospect_name)
         
-        if not candidate_row:
+        if not candidate:
             print(f"No candidate found for {prospect_name}")
             return
         
         # Extract candidate info
-        candidate_id, name, skills, education, certifications, experience, email, phone_number, linkedin, score, status = candidate_row
+        candidate_id, name, email = candidate["id"], candidate["name"], candidate["email"]
         
         # Score the call based on responses
         call_score = await score_call_responses(responses)
@@ -1192,11 +1362,7 @@ async def process_call_results(call_sid: str):
         new_status = "Interview Scheduled" if call_score >= 7 else "Not Scheduled"
         
         # Update database
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE candidates SET status = ? WHERE id = ?", (new_status, candidate_id))
-        conn.commit()
-        conn.close()
+        await run_write(update_candidate_status, candidate_id, new_status)
         
         # Send emails
         if email:
@@ -1302,16 +1468,8 @@ HR Management System
 async def auto_process_candidates():
     """Automatically process candidates after scoring - send emails and HR report"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
         # Get all candidates with scores
-        cursor.execute("""
-            SELECT name, email, score, status FROM candidates 
-            WHERE score IS NOT NULL AND email IS NOT NULL AND email != ''
-        """)
-        candidates = cursor.fetchall()
-        conn.close()
+        candidates = await run_read(fetch_emailable_candidates)
         
         if not candidates:
             return {"success": False, "message": "No candidates found for processing"}
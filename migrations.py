@@ -0,0 +1,481 @@
+"""
+Versioned schema migrations for candidates.db.
+
+The schema version lives in SQLite's PRAGMA user_version. Each migration runs
+once, in order, inside the writer transaction, so a half-applied migration is
+rolled back instead of leaving the schema in between versions.
+
+These migrations are for the SQLite file only. A server database
+(DATABASE_URL) gets its tables from repository.create_schema() instead and
+does without the SQLite-only parts: the FTS index and the triggers.
+
+Run directly to migrate the configured database:
+
+    python migrations.py
+"""
+import threading
+
+from candidate_store import sync_candidate_skills
+from db_pool import DB_PATH, write_connection
+from repository import VERSIONED_TABLES
+
+
+def _m001_initial_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            skills TEXT,
+            education TEXT,
+            certifications TEXT,
+            experience TEXT,
+            email TEXT,
+            phone_number TEXT,
+            linkedin TEXT,
+            score REAL,
+            status TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_descriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            company TEXT,
+            location TEXT,
+            type TEXT,
+            salary TEXT,
+            experience TEXT,
+            description TEXT,
+            requirements TEXT,
+            responsibilities TEXT,
+            skills TEXT,
+            benefits TEXT
+        )
+    """)
+
+
+def _m002_candidate_lookup_indexes(conn):
+    # process_call_results looks candidates up by name
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates (name)")
+    # candidate_exists checks email OR phone_number; SQLite answers the OR with both indexes
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates (email)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_phone_number ON candidates (phone_number)")
+    # Dashboard counts: both indexes cover their COUNT(*) queries without touching the table
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates (score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_status_score ON candidates (status, score)")
+    conn.execute("ANALYZE")
+
+
+# Columns mirrored into the full-text index, with their bm25 weights
+FTS_COLUMNS = ("name", "skills", "experience", "education", "certifications", "email")
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.5, 1.5, 3.0)
+
+
+def _m003_candidate_search_index(conn):
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+    # External-content FTS5 table: the text lives in candidates, the index in candidates_fts
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+            {columns},
+            content='candidates',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS candidates_fts_insert AFTER INSERT ON candidates BEGIN
+            INSERT INTO candidates_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS candidates_fts_delete AFTER DELETE ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    # Only re-index when searchable text changes, not on score/status updates
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS candidates_fts_update AFTER UPDATE OF {columns} ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO candidates_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild')")
+    # Make ORDER BY rank use the column weights above
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    conn.execute(f"INSERT INTO candidates_fts (candidates_fts, rank) VALUES ('rank', 'bm25({weights})')")
+
+
+def _m004_candidate_skills(conn):
+    # One row per (skill, candidate); the primary key is the skill -> candidates inverted index
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_skills (
+            skill TEXT NOT NULL,
+            candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+            PRIMARY KEY (skill, candidate_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills (candidate_id)")
+    sync_candidate_skills(conn)
+
+
+def _m005_dashboard_counters(conn):
+    # Single-row counters read by /analytics/dashboard, kept current by triggers
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_candidates INTEGER NOT NULL DEFAULT 0,
+            qualified_candidates INTEGER NOT NULL DEFAULT 0,
+            scheduled_interviews INTEGER NOT NULL DEFAULT 0,
+            total_job_descriptions INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_status_counts (
+            status TEXT PRIMARY KEY,
+            candidates INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # "x IS 1" turns a comparison into 0/1 even when score or status is NULL
+    qualified = "(({row}.score >= 70) IS 1)"
+    scheduled = "(({row}.status = 'Interview Scheduled') IS 1)"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS dashboard_candidate_insert AFTER INSERT ON candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_candidates = total_candidates + 1,
+                qualified_candidates = qualified_candidates + {qualified.format(row='new')},
+                scheduled_interviews = scheduled_interviews + {scheduled.format(row='new')}
+            WHERE id = 1;
+            INSERT INTO candidate_status_counts (status, candidates) VALUES (COALESCE(new.status, ''), 1)
+                ON CONFLICT (status) DO UPDATE SET candidates = candidates + 1;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS dashboard_candidate_delete AFTER DELETE ON candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_candidates = total_candidates - 1,
+                qualified_candidates = qualified_candidates - {qualified.format(row='old')},
+                scheduled_interviews = scheduled_interviews - {scheduled.format(row='old')}
+            WHERE id = 1;
+            UPDATE candidate_status_counts SET candidates = candidates - 1 WHERE status = COALESCE(old.status, '');
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS dashboard_candidate_update AFTER UPDATE OF score, status ON candidates BEGIN
+            UPDATE dashboard_stats SET
+                qualified_candidates = qualified_candidates - {qualified.format(row='old')} + {qualified.format(row='new')},
+                scheduled_interviews = scheduled_interviews - {scheduled.format(row='old')} + {scheduled.format(row='new')}
+            WHERE id = 1;
+            UPDATE candidate_status_counts SET candidates = candidates - 1 WHERE status = COALESCE(old.status, '');
+            INSERT INTO candidate_status_counts (status, candidates) VALUES (COALESCE(new.status, ''), 1)
+                ON CONFLICT (status) DO UPDATE SET candidates = candidates + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS dashboard_job_description_insert AFTER INSERT ON job_descriptions BEGIN
+            UPDATE dashboard_stats SET total_job_descriptions = total_job_descriptions + 1 WHERE id = 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS dashboard_job_description_delete AFTER DELETE ON job_descriptions BEGIN
+            UPDATE dashboard_stats SET total_job_descriptions = total_job_descriptions - 1 WHERE id = 1;
+        END
+    """)
+    # Backfill from the existing rows
+    conn.execute("""
+        INSERT OR REPLACE INTO dashboard_stats
+            (id, total_candidates, qualified_candidates, scheduled_interviews, total_job_descriptions)
+        SELECT 1,
+            (SELECT COUNT(*) FROM candidates),
+            (SELECT COUNT(*) FROM candidates WHERE score >= 70),
+            (SELECT COUNT(*) FROM candidates WHERE status = 'Interview Scheduled'),
+            (SELECT COUNT(*) FROM job_descriptions)
+    """)
+    conn.execute("DELETE FROM candidate_status_counts")
+    conn.execute("""
+        INSERT INTO candidate_status_counts (status, candidates)
+        SELECT COALESCE(status, ''), COUNT(*) FROM candidates GROUP BY COALESCE(status, '')
+    """)
+
+
+# 10-point score buckets 0..9; a perfect 100 lands in the 90-100 bucket
+SCORE_BUCKET_SQL = "MAX(0, MIN(9, CAST(COALESCE({row}.score, 0) / 10 AS INTEGER)))"
+
+
+def _m006_daily_rollups(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(candidates)")]
+    if "created_at" not in columns:
+        conn.execute("ALTER TABLE candidates ADD COLUMN created_at TEXT")
+        # Insert times were never recorded, so existing rows count as added today
+        conn.execute("UPDATE candidates SET created_at = datetime('now') WHERE created_at IS NULL")
+    # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so stamp rows inserted without one
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS candidates_created_at AFTER INSERT ON candidates
+        WHEN new.created_at IS NULL BEGIN
+            UPDATE candidates SET created_at = datetime('now') WHERE id = new.id;
+        END
+    """)
+
+    # Rollups are keyed by the day a candidate was added, so a range is a primary key range scan
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_status_counts (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_score_counts (
+            day TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_skill_counts (
+            day TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, skill)
+        ) WITHOUT ROWID
+    """)
+    # Status transitions are keyed by the day they happened
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_status_changes (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID
+    """)
+    # Append-only feed behind /analytics/activity; no foreign key so history outlives deletes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_activity (
+            id INTEGER PRIMARY KEY,
+            candidate_id INTEGER,
+            candidate_name TEXT,
+            action TEXT NOT NULL,
+            status TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+
+    def day(row):
+        return f"date(COALESCE({row}.created_at, 'now'))"
+
+    def add(table, key_column, key, row, delta):
+        return f"""
+            INSERT INTO {table} (day, {key_column}, candidates) VALUES ({day(row)}, {key}, {delta})
+                ON CONFLICT (day, {key_column}) DO UPDATE SET candidates = candidates + {delta};"""
+
+    def counts(row, delta):
+        status = f"COALESCE({row}.status, '')"
+        return (add("daily_status_counts", "status", status, row, delta)
+                + add("daily_score_counts", "bucket", SCORE_BUCKET_SQL.format(row=row), row, delta))
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_candidate_insert AFTER INSERT ON candidates BEGIN
+            {counts('new', 1)}
+            INSERT INTO daily_status_changes (day, status, candidates) VALUES (date('now'), COALESCE(new.status, ''), 1)
+                ON CONFLICT (day, status) DO UPDATE SET candidates = candidates + 1;
+            INSERT INTO candidate_activity (candidate_id, candidate_name, action, status)
+                VALUES (new.id, new.name, 'added', new.status);
+        END
+    """)
+    # BEFORE DELETE so the candidate's skills are still there to be discounted;
+    # the cascaded candidate_skills deletes then find no candidate and skip
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_candidate_delete BEFORE DELETE ON candidates BEGIN
+            {counts('old', -1)}
+            UPDATE daily_skill_counts SET candidates = candidates - 1
+            WHERE day = {day('old')}
+              AND skill IN (SELECT skill FROM candidate_skills WHERE candidate_id = old.id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rollup_candidate_update AFTER UPDATE OF score, status ON candidates BEGIN
+            {counts('old', -1)}
+            {counts('new', 1)}
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rollup_candidate_status_change AFTER UPDATE OF status ON candidates
+        WHEN old.status IS NOT new.status BEGIN
+            INSERT INTO daily_status_changes (day, status, candidates) VALUES (date('now'), COALESCE(new.status, ''), 1)
+                ON CONFLICT (day, status) DO UPDATE SET candidates = candidates + 1;
+            INSERT INTO candidate_activity (candidate_id, candidate_name, action, status)
+                VALUES (new.id, new.name, 'status_changed', new.status);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rollup_skill_insert AFTER INSERT ON candidate_skills BEGIN
+            INSERT INTO daily_skill_counts (day, skill, candidates)
+                SELECT date(COALESCE(created_at, 'now')), new.skill, 1 FROM candidates WHERE id = new.candidate_id
+                ON CONFLICT (day, skill) DO UPDATE SET candidates = candidates + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rollup_skill_delete AFTER DELETE ON candidate_skills BEGIN
+            UPDATE daily_skill_counts SET candidates = candidates - 1
+            WHERE skill = old.skill
+              AND day = (SELECT date(COALESCE(created_at, 'now')) FROM candidates WHERE id = old.candidate_id);
+        END
+    """)
+
+    # Backfill from the existing rows
+    for table in ("daily_status_counts", "daily_score_counts", "daily_skill_counts", "daily_status_changes"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("""
+        INSERT INTO daily_status_counts (day, status, candidates)
+        SELECT date(created_at), COALESCE(status, ''), COUNT(*) FROM candidates GROUP BY 1, 2
+    """)
+    conn.execute(f"""
+        INSERT INTO daily_score_counts (day, bucket, candidates)
+        SELECT date(created_at), {SCORE_BUCKET_SQL.format(row='candidates')}, COUNT(*) FROM candidates GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO daily_skill_counts (day, skill, candidates)
+        SELECT date(c.created_at), s.skill, COUNT(*)
+        FROM candidate_skills s JOIN candidates c ON c.id = s.candidate_id
+        GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO daily_status_changes (day, status, candidates)
+        SELECT day, status, candidates FROM daily_status_counts
+    """)
+
+
+def _m007_table_versions(conn):
+    # Monotonic per-table change counters, visible to every process sharing the file
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+            """)
+
+
+def _m008_candidate_archive(conn):
+    # Cold storage for old and closed candidates; ids are kept, AUTOINCREMENT never reuses them
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidates_archive (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            skills TEXT,
+            education TEXT,
+            certifications TEXT,
+            experience TEXT,
+            email TEXT,
+            phone_number TEXT,
+            linkedin TEXT,
+            score REAL,
+            status TEXT,
+            created_at TEXT,
+            archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_archive_name ON candidates_archive (name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_archive_email ON candidates_archive (email)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_archive_score ON candidates_archive (score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_archive_status_score ON candidates_archive (status, score)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_archive_skills (
+            skill TEXT NOT NULL,
+            candidate_id INTEGER NOT NULL REFERENCES candidates_archive (id) ON DELETE CASCADE,
+            PRIMARY KEY (skill, candidate_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_candidate_archive_skills_candidate ON candidate_archive_skills (candidate_id)"
+    )
+
+
+def _m009_table_version_timestamps(conn):
+    # Last-Modified for conditional GETs: stamp table_versions whenever a version is bumped
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(table_versions)")]
+    if "updated_at" not in columns:
+        conn.execute("ALTER TABLE table_versions ADD COLUMN updated_at TEXT")
+    conn.execute("UPDATE table_versions SET updated_at = datetime('now') WHERE updated_at IS NULL")
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            trigger = f"{table}_version_{event.lower()}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute(f"""
+                CREATE TRIGGER {trigger} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1, updated_at = datetime('now')
+                    WHERE name = '{table}';
+                END
+            """)
+
+
+def _m010_archive_phone_index(conn):
+    # Imports dedupe on email or phone against the archive as well as the hot table
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_candidates_archive_phone_number ON candidates_archive (phone_number)"
+    )
+
+
+# (version, description, function) in the order they must be applied
+MIGRATIONS = [
+    (1, "initial candidates and job_descriptions tables", _m001_initial_schema),
+    (2, "indexes for candidate lookups and dashboard counts", _m002_candidate_lookup_indexes),
+    (3, "full-text search index over candidates", _m003_candidate_search_index),
+    (4, "normalized candidate_skills table", _m004_candidate_skills),
+    (5, "trigger-maintained dashboard counters", _m005_dashboard_counters),
+    (6, "candidate timestamps and daily analytics rollups", _m006_daily_rollups),
+    (7, "per-table change counters", _m007_table_versions),
+    (8, "candidate archive tables", _m008_candidate_archive),
+    (9, "modification times on table_versions", _m009_table_version_timestamps),
+    (10, "phone number index on candidates_archive", _m010_archive_phone_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(path=None):
+    """Apply every pending migration and return the resulting schema version"""
+    with write_connection(path) as conn:
+        version = get_schema_version(conn)
+        for migration_version, description, apply in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            print(f"Applying migration {migration_version}: {description}")
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration_version)}")
+            version = migration_version
+        return version
+
+
+def ensure_schema(path=None):
+    """Migrate the database once per process"""
+    path = path or DB_PATH
+    if path in _migrated_paths:
+        return
+    with _migrate_lock:
+        if path not in _migrated_paths:
+            migrate(path)
+            _migrated_paths.add(path)
+
+
+if __name__ == "__main__":
+    print(f"Schema version: {migrate()}")
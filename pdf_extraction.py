@@ -0,0 +1,95 @@
+"""
+Tiered, page-lazy PDF text extraction.
+
+PyPDF2 reads a typical resume roughly ten times faster than pdfminer, but
+it does worse on some layouts and fonts: text comes back empty, as (cid:NN)
+glyph codes, or as symbol soup. Each PDF goes through PyPDF2 first, page by
+page. From the first page where PyPDF2 fails or its text looks unusable, the
+rest of the document is read with pdfminer instead; pages already read stand.
+
+Pages are yielded one at a time and parsed only when asked for, so a caller
+that stops early (text_extraction.take_budget, once the prompt has enough
+text) never pays for the rest of the document. Neither tier reads past
+EXTRACT_MAX_PAGES pages.
+"""
+import io
+import os
+import re
+import sys
+
+# Pages read from a PDF; 0 reads every page
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "10"))
+
+# Below this many letters or digits per page, the text layer is treated as missing
+_MIN_CHARS_PER_PAGE = 40
+# Share of characters that must be letters, digits, whitespace or common punctuation
+_MIN_READABLE_RATIO = 0.85
+_CID = re.compile(r"\(cid:\d+\)")
+_PUNCTUATION = set(".,;:!?'\"()[]{}-_/\\@#&%+*=<>|~`$^•·–—’‘“”…")
+
+
+def looks_garbled(text, pages):
+    """True when extracted text is too sparse or too unreadable to trust"""
+    if not text:
+        return True
+    # Unmapped glyphs come out as "(cid:123)"
+    if sum(len(match) for match in _CID.findall(text)) > len(text) * 0.1:
+        return True
+    alnum = sum(char.isalnum() for char in text)
+    if alnum < _MIN_CHARS_PER_PAGE * max(1, pages):
+        return True
+    readable = sum(char.isalnum() or char.isspace() or char in _PUNCTUATION for char in text)
+    if readable < len(text) * _MIN_READABLE_RATIO:
+        return True
+    return False
+
+
+def _page_limit(max_pages):
+    return max_pages if max_pages and max_pages > 0 else None
+
+
+def iter_pypdf_pages(f, max_pages=EXTRACT_MAX_PAGES):
+    """Fast tier: yield the text of each page with PyPDF2"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(f)
+    for page in reader.pages[:_page_limit(max_pages)]:
+        yield page.extract_text() or ""
+
+
+def iter_pdfminer_pages(f, max_pages=EXTRACT_MAX_PAGES, start=0):
+    """Careful tier: yield the text of each page from index start on with pdfminer's layout analysis"""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    limit = _page_limit(max_pages)
+    if limit and start >= limit:
+        return
+    # Pages before start are skipped before layout analysis, so they cost next to nothing
+    page_numbers = range(start, limit or sys.maxsize) if start else None
+    for layout in extract_pages(f, page_numbers=page_numbers, maxpages=limit or 0):
+        yield "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+
+
+def iter_pdf_pages(f, max_pages=EXTRACT_MAX_PAGES):
+    """Yield page texts of a PDF file object: PyPDF2, then pdfminer from the first page that looks wrong"""
+    if not f.seekable():
+        f = io.BytesIO(f.read())
+    pages = iter_pypdf_pages(f, max_pages)
+    index = 0
+    while True:
+        try:
+            text = next(pages, None)
+        except Exception:
+            # PyPDF2 could not open the file or broke on this page
+            break
+        if text is None:
+            return
+        if looks_garbled(text, 1):
+            break
+        yield text
+        index += 1
+    pages.close()
+    f.seek(0)
+    yield from iter_pdfminer_pages(f, max_pages, start=index)
+
@@ -0,0 +1,95 @@
+"""
+Versioned in-process cache for hot reads.
+
+Every write to candidates or job_descriptions bumps that table's row in
+table_versions: triggers do it on the SQLite file, and the write jobs
+themselves (repository.touch_table) on a server database.
+Cached values are stored with the version they were read at; a lookup reads
+the current version first, which is a single primary-key lookup, and only
+reloads when it has moved. Writes from other processes (the Streamlit apps)
+invalidate entries the same way.
+
+Cached values are shared between requests, so callers must not mutate them.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import bindparam, select
+
+from repository import execute, table_versions
+
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "256"))
+
+
+class ReadCache:
+    """Bounded LRU of (version, value) entries with hit/miss counters"""
+
+    def __init__(self, max_entries=READ_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, version, loader):
+        """Return the value cached for key at version, calling loader() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            if entry is not None:
+                self.stale += 1
+        # Load outside the lock so slow reads do not block cache hits
+        value = loader()
+        with self._lock:
+            current = self._entries.get(key)
+            # A concurrent load may already have stored a newer version
+            if current is None or current[0] <= version:
+                self._entries[key] = (version, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0
+            }
+
+
+read_cache = ReadCache()
+
+_SELECT_VERSION = (
+    select(table_versions.c.version, table_versions.c.updated_at)
+    .where(table_versions.c.name == bindparam("table_name"))
+)
+
+
+def table_version_info(conn, table):
+    """(change counter, last change as 'YYYY-MM-DD HH:MM:SS' UTC) of a table"""
+    row = execute(conn, _SELECT_VERSION, {"table_name": table}).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def table_version(conn, table):
+    """Current change counter of a table"""
+    return table_version_info(conn, table)[0]
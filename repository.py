@@ -0,0 +1,410 @@
+"""
+SQLAlchemy Core tables, statements and repositories for candidates and job
+descriptions.
+
+DATABASE_URL picks the backend. It defaults to the SQLite file at
+CANDIDATES_DB_PATH, where reads use the WAL connection pool (db_pool.py) and
+writes go through the single-writer queue (db_writer.py). Pointed at a server
+database (e.g. postgresql://...), reads use this module's pooled engine and
+each write job runs in its own engine transaction; the server handles
+concurrent writers. read_connection(), write() and submit_write() hide the
+difference, so the same job functions run on either backend.
+
+Candidate and job-description code is written against the Core statements
+here and runs them with execute(), which accepts a raw sqlite3 connection as
+well as a SQLAlchemy one. Rows come back as tuples (or dicts, from the
+repositories). Statements are built once at import time; SQLAlchemy caches
+their compiled form per engine, and sqlite3 caches prepared statements by
+their SQL text.
+
+On SQLite, migrations.py owns the schema and adds what only SQLite has: the
+full-text search index, the trigger-maintained dashboard counters and daily
+rollups, and the triggers that bump table_versions. On a server database,
+create_schema() creates the tables below with metadata.create_all() and the
+write jobs bump table_versions themselves (touch_table()); search falls back
+to substring matching and the rollup-based analytics are not available.
+"""
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column, Float, ForeignKey, Index, Integer, MetaData, PrimaryKeyConstraint, Table, Text, bindparam,
+    create_engine, event, insert, select, update
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+
+import db_pool
+import db_writer
+from db_pool import CONNECTION_PRAGMAS, DB_BUSY_TIMEOUT_MS, DB_PATH, DB_POOL_SIZE
+
+
+def _database_url():
+    default = f"sqlite:///{DB_PATH}"
+    url = os.getenv("DATABASE_URL") or default
+    if make_url(url).get_backend_name() == "sqlite" and url != default:
+        # The read pool and the write queue open CANDIDATES_DB_PATH; a second file would split the data
+        raise ValueError(f"DATABASE_URL={url!r} names another SQLite file; set CANDIDATES_DB_PATH instead")
+    return url
+
+
+DATABASE_URL = _database_url()
+SQLITE_BACKEND = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "4"))
+
+metadata = MetaData()
+
+candidates = Table(
+    "candidates", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", Text, index=True),
+    Column("skills", Text),
+    Column("education", Text),
+    Column("certifications", Text),
+    Column("experience", Text),
+    Column("email", Text, index=True),
+    Column("phone_number", Text, index=True),
+    Column("linkedin", Text),
+    Column("score", Float, index=True),
+    Column("status", Text),
+    Column("created_at", Text),
+    Index("idx_candidates_status_score", "status", "score"),
+)
+
+# Cold storage for old and closed candidates (candidate_archive.py); ids are kept
+candidates_archive = Table(
+    "candidates_archive", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("name", Text, index=True),
+    Column("skills", Text),
+    Column("education", Text),
+    Column("certifications", Text),
+    Column("experience", Text),
+    Column("email", Text, index=True),
+    Column("phone_number", Text, index=True),
+    Column("linkedin", Text),
+    Column("score", Float, index=True),
+    Column("status", Text),
+    Column("created_at", Text),
+    Column("archived_at", Text, nullable=False),
+    Index("idx_candidates_archive_status_score", "status", "score"),
+)
+
+# One row per (skill, candidate): the skill -> candidates inverted index
+candidate_skills = Table(
+    "candidate_skills", metadata,
+    Column("skill", Text, nullable=False),
+    Column("candidate_id", Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False, index=True),
+    PrimaryKeyConstraint("skill", "candidate_id"),
+)
+
+candidate_archive_skills = Table(
+    "candidate_archive_skills", metadata,
+    Column("skill", Text, nullable=False),
+    Column(
+        "candidate_id", Integer, ForeignKey("candidates_archive.id", ondelete="CASCADE"), nullable=False, index=True
+    ),
+    PrimaryKeyConstraint("skill", "candidate_id"),
+)
+
+job_descriptions = Table(
+    "job_descriptions", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("title", Text),
+    Column("company", Text),
+    Column("location", Text),
+    Column("type", Text),
+    Column("salary", Text),
+    Column("experience", Text),
+    Column("description", Text),
+    Column("requirements", Text),
+    Column("responsibilities", Text),
+    Column("skills", Text),
+    Column("benefits", Text),
+)
+
+# Change counters read by read_cache
+table_versions = Table(
+    "table_versions", metadata,
+    Column("name", Text, primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+    Column("updated_at", Text),
+)
+
+# Tables whose every change bumps a row in table_versions
+VERSIONED_TABLES = ("candidates", "job_descriptions")
+
+JOB_DESCRIPTION_FIELDS = tuple(column.name for column in job_descriptions.columns if column.name != "id")
+
+# Statements reused by every call
+_SELECT_JOB_DESCRIPTIONS = select(job_descriptions).order_by(job_descriptions.c.id)
+_SELECT_JOB_DESCRIPTION = select(job_descriptions).where(job_descriptions.c.id == bindparam("job_id"))
+_INSERT_JOB_DESCRIPTION = insert(job_descriptions).values({field: bindparam(field) for field in JOB_DESCRIPTION_FIELDS})
+_SELECT_TABLE_VERSION = (
+    select(table_versions.c.version, table_versions.c.updated_at)
+    .where(table_versions.c.name == bindparam("table_name"))
+)
+_BUMP_TABLE_VERSION = (
+    update(table_versions)
+    .where(table_versions.c.name == bindparam("table_name"))
+    .values(version=table_versions.c.version + 1, updated_at=bindparam("updated_at"))
+)
+_SELECT_CANDIDATE_BY_NAME = (
+    select(candidates).where(candidates.c.name == bindparam("name")).order_by(candidates.c.id).limit(1)
+)
+_SELECT_CANDIDATE = select(candidates).where(candidates.c.id == bindparam("candidate_id"))
+_UPDATE_CANDIDATE_STATUS = (
+    update(candidates).where(candidates.c.id == bindparam("candidate_id")).values(status=bindparam("new_status"))
+)
+
+# Statements run on a raw sqlite3 connection are compiled for it, with :name parameters
+_SQLITE_DIALECT = sqlite.dialect(paramstyle="named")
+
+
+def execute(conn, statement, params=None):
+    """
+    Run a Core statement on a SQLAlchemy connection or a raw sqlite3 one (the
+    read pool's and the write queue's) and return the cursor. params is a
+    dict, or a list of dicts to run the statement once per row.
+    """
+    if not isinstance(conn, sqlite3.Connection):
+        return conn.execute(statement, params)
+    if isinstance(params, list):
+        compiled = statement.compile(dialect=_SQLITE_DIALECT)
+        return conn.executemany(compiled.string, [compiled.construct_params(row) for row in params])
+    if params and statement.is_dml:
+        compiled = statement.compile(dialect=_SQLITE_DIALECT)
+        return conn.execute(compiled.string, compiled.construct_params(params))
+    if params:
+        statement = statement.params(params)
+    # Expands IN (...) lists into one parameter per value
+    compiled = statement.compile(dialect=_SQLITE_DIALECT, compile_kwargs={"render_postcompile": True})
+    return conn.execute(compiled.string, compiled.construct_params())
+
+
+def on_sqlite(conn):
+    """True for connections to the SQLite file, where migrations.py's triggers and FTS index exist"""
+    return isinstance(conn, sqlite3.Connection) or conn.dialect.name == "sqlite"
+
+
+def utc_timestamp():
+    """Now as 'YYYY-MM-DD HH:MM:SS' UTC, the format SQLite's datetime('now') stores"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def touch_table(conn, table):
+    """Bump table's change counter; on SQLite the triggers from migrations.py already have"""
+    if not on_sqlite(conn):
+        execute(conn, _BUMP_TABLE_VERSION, {"table_name": table, "updated_at": utc_timestamp()})
+
+
+def insert_job_description(conn, values):
+    """Write job: insert a job description and return its id; missing fields are stored as ''"""
+    params = {field: values.get(field, '') for field in JOB_DESCRIPTION_FIELDS}
+    result = execute(conn, _INSERT_JOB_DESCRIPTION, params)
+    touch_table(conn, "job_descriptions")
+    return result.lastrowid if isinstance(conn, sqlite3.Connection) else result.inserted_primary_key[0]
+
+
+def update_candidate_status(conn, candidate_id, status):
+    """Write job: set a candidate's status and return whether a row was updated"""
+    result = execute(conn, _UPDATE_CANDIDATE_STATUS, {"candidate_id": int(candidate_id), "new_status": status})
+    if result.rowcount > 0:
+        touch_table(conn, "candidates")
+    return result.rowcount > 0
+
+
+def _configure_sqlite(engine):
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        # Let the "begin" hook below issue BEGIN instead of pysqlite's implicit one
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        # Reads only; writes to the SQLite file go through the write queue's own connection
+        conn.exec_driver_sql("BEGIN")
+
+
+def build_engine(url=DATABASE_URL):
+    """Create a pooled engine for a database URL"""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+    engine = create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        connect_args={"timeout": DB_BUSY_TIMEOUT_MS / 1000, "check_same_thread": False},
+    )
+    _configure_sqlite(engine)
+    return engine
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine for DATABASE_URL"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_engine()
+    return _engine
+
+
+def create_schema(engine=None):
+    """Bring the database up to date: migrations.py on SQLite, create_all() on a server database"""
+    engine = engine or get_engine()
+    if engine.dialect.name == "sqlite":
+        from migrations import ensure_schema
+        ensure_schema(engine.url.database)
+        return
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        present = set(conn.execute(select(table_versions.c.name)).scalars())
+        missing = [
+            {"name": table, "version": 0, "updated_at": utc_timestamp()}
+            for table in VERSIONED_TABLES if table not in present
+        ]
+        if missing:
+            conn.execute(insert(table_versions), missing)
+
+
+def dispose_engine():
+    """Close every pooled connection"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+# --- Backend-neutral connections ------------------------------------------
+
+@contextmanager
+def read_connection():
+    """A connection for reads: from the SQLite read pool, or from the engine's pool"""
+    if SQLITE_BACKEND:
+        with db_pool.read_connection() as conn:
+            yield conn
+    else:
+        with get_engine().connect() as conn:
+            yield conn
+
+
+def write(func, *args, **kwargs):
+    """Run the write job func(conn, *args, **kwargs) in a committed transaction and return its result"""
+    if SQLITE_BACKEND:
+        return db_writer.write(func, *args, **kwargs)
+    with get_engine().begin() as conn:
+        return func(conn, *args, **kwargs)
+
+
+_server_writes = None
+_server_writes_lock = threading.Lock()
+
+
+def submit_write(func, *args, **kwargs):
+    """Queue the write job func(conn, *args, **kwargs) and return a Future for its result"""
+    global _server_writes
+    if SQLITE_BACKEND:
+        return db_writer.submit_write(func, *args, **kwargs)
+    if _server_writes is None:
+        with _server_writes_lock:
+            if _server_writes is None:
+                _server_writes = ThreadPoolExecutor(DB_POOL_SIZE, thread_name_prefix="db-write")
+    return _server_writes.submit(write, func, *args, **kwargs)
+
+
+def close_writes():
+    """Finish queued writes on either backend"""
+    global _server_writes
+    db_writer.close_write_queues()
+    with _server_writes_lock:
+        executor, _server_writes = _server_writes, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class _Repository:
+    table = None
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    def _read(self):
+        return self.engine.connect()
+
+    def _write(self, func, *args):
+        """Run a write job: through the write queue of the SQLite file, or in an engine transaction"""
+        if self.engine.dialect.name == "sqlite":
+            return db_writer.get_write_queue(self.engine.url.database).write(func, *args)
+        with self.engine.begin() as conn:
+            return func(conn, *args)
+
+    def version_info(self):
+        """(change counter, last change as 'YYYY-MM-DD HH:MM:SS' UTC) of the repository's table"""
+        with self._read() as conn:
+            row = conn.execute(_SELECT_TABLE_VERSION, {"table_name": self.table}).first()
+        return (row[0], row[1]) if row else (0, None)
+
+    def version(self):
+        """Change counter of the repository's table, for read_cache"""
+        return self.version_info()[0]
+
+
+class JobDescriptionRepository(_Repository):
+    """Job descriptions as dicts keyed by column name"""
+
+    table = "job_descriptions"
+
+    def list(self):
+        with self._read() as conn:
+            return [dict(row._mapping) for row in conn.execute(_SELECT_JOB_DESCRIPTIONS)]
+
+    def get(self, job_id):
+        """Return one job description, or None"""
+        with self._read() as conn:
+            row = conn.execute(_SELECT_JOB_DESCRIPTION, {"job_id": int(job_id)}).first()
+        return dict(row._mapping) if row else None
+
+    def add(self, values):
+        """Insert a job description and return its id; missing fields are stored as ''"""
+        return self._write(insert_job_description, values)
+
+
+class CandidateRepository(_Repository):
+    """Single-candidate lookups and status updates"""
+
+    table = "candidates"
+
+    def get(self, candidate_id):
+        with self._read() as conn:
+            row = conn.execute(_SELECT_CANDIDATE, {"candidate_id": int(candidate_id)}).first()
+        return dict(row._mapping) if row else None
+
+    def get_by_name(self, name):
+        """Return the first candidate with this name, or None"""
+        with self._read() as conn:
+            row = conn.execute(_SELECT_CANDIDATE_BY_NAME, {"name": name}).first()
+        return dict(row._mapping) if row else None
+
+    def update_status(self, candidate_id, status):
+        """Set a candidate's status and return whether a row was updated"""
+        return self._write(update_candidate_status, candidate_id, status)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Container,
   Paper,
@@ -35,10 +35,16 @@ import {
   Refresh
 } from '@mui/icons-material';
 
+const PAGE_SIZE = 100;
+// Wait for typing or slider dragging to pause before querying the server
+const FILTER_DEBOUNCE_MS = 300;
+
 const Candidates = () => {
   const [candidates, setCandidates] = useState([]);
-  const [filteredCandidates, setFilteredCandidates] = useState([]);
+  const [statusOptions, setStatusOptions] = useState(['All']);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'info' });
   
   // Filter states
@@ -52,64 +58,77 @@ const Candidates = () => {
   const [editingCandidate, setEditingCandidate] = useState(null);
   const [editForm, setEditForm] = useState({});
 
-  useEffect(() => {
-    fetchCandidates();
-  }, []);
+  // Only the latest request may update the table; older responses can arrive after it
+  const latestRequest = useRef(0);
 
+  // Any filter change starts again from the first page
   useEffect(() => {
-    applyFilters();
-  }, [candidates, searchName, filterSkill, scoreRange, filterStatus]); // eslint-disable-line react-hooks/exhaustive-deps
+    // A cursor from the old filters must not be used to page the new results
+    setNextCursor(null);
+    const timer = setTimeout(() => fetchCandidates(), FILTER_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchName, filterSkill, scoreRange, filterStatus]); // eslint-disable-line react-hooks/exhaustive-deps
 
-  const fetchCandidates = async () => {
-    setLoading(true);
+  // Filters are applied by the server, so they cover every candidate, not just the loaded pages
+  const filterParams = () => {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (filterStatus !== 'All') {
+      params.set('status', filterStatus);
+    }
+    if (scoreRange[0] > 0) {
+      params.set('min_score', scoreRange[0]);
+    }
+    if (scoreRange[1] < 100) {
+      params.set('max_score', scoreRange[1]);
+    }
+    if (filterSkill.trim()) {
+      params.set('skills', filterSkill);
+    }
+    return params;
+  };
+
+  // Fetches the first page, or the page after `cursor` when loading more
+  const fetchCandidates = async (cursor = null) => {
+    const loadMore = typeof cursor === 'string';
+    const request = ++latestRequest.current;
+    loadMore ? setLoadingMore(true) : setLoading(true);
     try {
-      const response = await fetch('http://localhost:8080/candidates');
-      if (response.ok) {
-        const data = await response.json();
-        setCandidates(data);
+      const params = filterParams();
+      const query = searchName.trim();
+      if (query) {
+        // Name and email are matched by the full-text search, best matches first
+        params.set('q', query);
       } else {
+        params.set('sort', '-id');
+      }
+      if (loadMore) {
+        params.set('cursor', cursor);
+      }
+      const endpoint = query ? 'candidates/search' : 'candidates';
+      const response = await fetch(`http://localhost:8080/${endpoint}?${params}`);
+      if (!response.ok) {
         throw new Error('Failed to fetch candidates');
       }
+      const data = await response.json();
+      if (request !== latestRequest.current) {
+        return;
+      }
+      setCandidates(prev => (loadMore ? [...prev, ...data.candidates] : data.candidates));
+      setNextCursor(data.next_cursor);
+      // Keep every status seen so far selectable, even once the table is filtered down to one
+      setStatusOptions(prev => Array.from(new Set([...prev, ...data.candidates.map(c => c.status).filter(Boolean)])));
     } catch (error) {
+      if (request !== latestRequest.current) {
+        return;
+      }
       console.error('Error fetching candidates:', error);
       setSnackbar({ open: true, message: 'Failed to fetch candidates', severity: 'error' });
     } finally {
-      setLoading(false);
-    }
-  };
-
-  const applyFilters = () => {
-    let filtered = [...candidates];
-
-    // Search by name or email
-    if (searchName) {
-      filtered = filtered.filter(candidate =>
-        candidate.name?.toLowerCase().includes(searchName.toLowerCase()) ||
-        candidate.email?.toLowerCase().includes(searchName.toLowerCase())
-      );
-    }
-
-    // Filter by skills
-    if (filterSkill) {
-      const skills = filterSkill.split(',').map(s => s.trim().toLowerCase());
-      filtered = filtered.filter(candidate =>
-        skills.every(skill => 
-          candidate.skills?.toLowerCase().includes(skill)
-        )
-      );
-    }
-
-    // Filter by score range
-    filtered = filtered.filter(candidate =>
-      candidate.score >= scoreRange[0] && candidate.score <= scoreRange[1]
-    );
-
-    // Filter by status
-    if (filterStatus !== 'All') {
-      filtered = filtered.filter(candidate => candidate.status === filterStatus);
+      if (request === latestRequest.current) {
+        setLoading(false);
+        setLoadingMore(false);
+      }
     }
-
-    setFilteredCandidates(filtered);
   };
 
   const handleEdit = (candidate) => {
@@ -191,8 +210,6 @@ const Candidates = () => {
     }
   };
 
-  const statusOptions = ['All', ...Array.from(new Set(candidates.map(c => c.status).filter(Boolean)))];
-
   return (
     <Container maxWidth="xl" sx={{ py: 4 }}>
       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 4 }}>
@@ -202,7 +219,7 @@ const Candidates = () => {
         <Button
           variant="outlined"
           startIcon={<Refresh />}
-          onClick={fetchCandidates}
+          onClick={() => fetchCandidates()}
           disabled={loading}
         >
           Refresh
@@ -276,7 +293,7 @@ const Candidates = () => {
 
       {/* Results Summary */}
       <Alert severity="info" sx={{ mb: 3 }}>
-        Showing {filteredCandidates.length} of {candidates.length} candidates
+        Showing {candidates.length} matching candidates{nextCursor ? ' (load more for the rest)' : ''}
       </Alert>
 
       {/* Candidates Table */}
@@ -285,7 +302,7 @@ const Candidates = () => {
           <Box sx={{ display: 'flex', justifyContent: 'center', py: 4 }}>
             <CircularProgress />
           </Box>
-        ) : filteredCandidates.length === 0 ? (
+        ) : candidates.length === 0 ? (
           <Alert severity="info">
             No candidates found matching your criteria.
           </Alert>
@@ -308,7 +325,7 @@ const Candidates = () => {
                 </TableRow>
               </TableHead>
               <TableBody>
-                {filteredCandidates.map((candidate) => (
+                {candidates.map((candidate) => (
                   <TableRow key={candidate.id} hover>
                     <TableCell sx={{ fontWeight: 'medium' }}>
                       {candidate.name || 'N/A'}
@@ -388,6 +405,17 @@ const Candidates = () => {
             </Table>
           </TableContainer>
         )}
+        {nextCursor && !loading && (
+          <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+            <Button
+              variant="outlined"
+              onClick={() => fetchCandidates(nextCursor)}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </Box>
+        )}
       </Paper>
 
       {/* Edit Dialog */}
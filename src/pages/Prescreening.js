@@ -55,13 +55,29 @@ const Prescreening = () => {
 
   const fetchCandidates = async () => {
     try {
-      const response = await fetch('http://localhost:8080/candidates');
-      if (response.ok) {
-        const allCandidates = await response.json();
-        // Filter candidates with score >= 70 and status 'Interview Scheduled' (matching HR_app.py logic)
-        const eligible = allCandidates.filter(c => c.score >= 70 && c.status === 'Interview Scheduled');
-        setCandidates(eligible);
-      }
+      // Candidates with score >= 70 and status 'Interview Scheduled' (matching HR_app.py logic),
+      // filtered server-side and fetched page by page
+      const params = new URLSearchParams({
+        status: 'Interview Scheduled',
+        min_score: 70,
+        fields: 'name,email,phone_number,score,status',
+        limit: 500
+      });
+      const eligible = [];
+      let cursor = null;
+      do {
+        if (cursor) {
+          params.set('cursor', cursor);
+        }
+        const response = await fetch(`http://localhost:8080/candidates?${params}`);
+        if (!response.ok) {
+          break;
+        }
+        const data = await response.json();
+        eligible.push(...data.candidates);
+        cursor = data.next_cursor;
+      } while (cursor);
+      setCandidates(eligible);
     } catch (error) {
       console.error('Error fetching candidates:', error);
       setSnackbar({ open: true, message: 'Failed to fetch candidates', severity: 'error' });
@@ -57,10 +57,11 @@ const ResumeParser = () => {
 
   const fetchCandidates = async () => {
     try {
-      const response = await fetch('http://localhost:8080/candidates');
+      // Most recent candidates only; the full list is paged on the Candidates page
+      const response = await fetch('http://localhost:8080/candidates?limit=500&sort=-id');
       if (response.ok) {
         const data = await response.json();
-        setCandidates(data);
+        setCandidates(data.candidates);
       }
     } catch (error) {
       console.error('Error fetching candidates:', error);
@@ -47,8 +47,8 @@ api.interceptors.response.use(
 
 // API endpoints
 export const candidatesAPI = {
-  // Get all candidates
-  getAll: () => api.get('/candidates'),
+  // Get one page of candidates ({ limit, cursor, fields, sort, status, min_score, max_score, skills, skills_mode })
+  getAll: (params = {}) => api.get('/candidates', { params }),
   
   // Get candidate by ID
   getById: (id) => api.get(`/candidates/${id}`),
@@ -62,11 +62,11 @@ export const candidatesAPI = {
   // Delete candidate
   delete: (id) => api.delete(`/candidates/${id}`),
   
-  // Search candidates
-  search: (query) => api.get(`/candidates/search?q=${query}`),
+  // Ranked full-text search ({ limit, cursor, fields, status, min_score, max_score, skills, skills_mode })
+  search: (query, params = {}) => api.get('/candidates/search', { params: { q: query, ...params } }),
   
   // Filter candidates by status
-  filterByStatus: (status) => api.get(`/candidates?status=${status}`),
+  filterByStatus: (status) => api.get('/candidates', { params: { status } }),
 };
 
 export const prescreeningAPI = {
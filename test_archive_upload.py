@@ -0,0 +1,133 @@
+"""
+Regression tests for reading resume archives member by member (archive_upload.py).
+
+    python -m pytest -q test_archive_upload.py
+"""
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import archive_upload
+from archive_upload import iter_archive_members
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _tar(files, mode="w:gz"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, content in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+def _resumes(count, size=64):
+    # Random bytes do not compress, so a cut in the stream lands inside a known member
+    return [(f"resume{index}.txt", os.urandom(size)) for index in range(count)]
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Names of the members whose content was read"""
+    names = []
+    member = archive_upload._member
+
+    def counting_member(name, *args):
+        names.append(name)
+        return member(name, *args)
+
+    monkeypatch.setattr(archive_upload, "_member", counting_member)
+    return names
+
+
+@pytest.mark.parametrize("make", [_zip, _tar])
+def test_cap_stops_before_reading_the_next_member(reads, make):
+    members = iter_archive_members(make(_resumes(5)), max_members=2)
+
+    assert [member.name for member in members] == ["resume0.txt", "resume1.txt"]
+    assert members.truncated
+    assert members.error is None
+    assert reads == ["resume0.txt", "resume1.txt"]
+
+
+@pytest.mark.parametrize("make", [_zip, _tar])
+def test_archive_at_the_cap_is_not_truncated(make):
+    members = iter_archive_members(make(_resumes(2)), max_members=2)
+
+    assert len(list(members)) == 2
+    assert not members.truncated
+
+
+def test_unreadable_members_do_not_count_toward_the_cap(reads):
+    files = [("notes.xyz", b"x"), ("resume0.txt", b"a"), ("big.txt", b"b" * 2048), ("resume1.txt", b"c")]
+    members = iter_archive_members(_zip(files + [("resume2.txt", b"d")]), max_members=2, max_member_mb=1 / 1024)
+
+    assert [(member.name, member.error) for member in members] == [
+        ("notes.xyz", "Unsupported file type"),
+        ("resume0.txt", None),
+        ("big.txt", "File is too large"),
+        ("resume1.txt", None),
+    ]
+    assert members.truncated
+
+
+def test_truncated_tar_keeps_members_read_before_the_damage():
+    data = _tar(_resumes(40, size=4096)).getvalue()
+    members = iter_archive_members(io.BytesIO(data[:len(data) // 2]))
+
+    read = list(members)
+
+    assert 0 < len(read) < 40
+    assert all(member.error is None for member in read)
+    assert members.error.startswith(f"Archive is damaged after {len(read)} files")
+    assert not members.truncated
+
+
+def test_tar_cut_off_after_its_last_member_reports_the_damage():
+    # tarfile alone would take the missing end-of-archive padding for a clean end
+    data = _tar(_resumes(3, size=4096)).getvalue()
+
+    members = iter_archive_members(io.BytesIO(data[:-16]))
+
+    assert len(list(members)) == 3
+    assert members.error == "Archive is damaged after 3 files: compressed data ends before the end of the archive"
+
+
+def test_corrupt_zip_member_fails_on_its_own():
+    data = bytearray(_zip(_resumes(3, size=256)).getvalue())
+    # Damage the compressed data of the second member only
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as archive:
+        info = archive.getinfo("resume1.txt")
+    start = info.header_offset + 30 + len(info.filename) + len(info.extra)
+    data[start:start + 16] = bytes(16)
+
+    members = list(iter_archive_members(io.BytesIO(bytes(data))))
+
+    assert [member.error is None for member in members] == [True, False, True]
+    assert members[1].error.startswith("Could not read member")
+
+
+@pytest.mark.parametrize("content", [b"", b"not an archive at all" * 20])
+def test_upload_that_is_not_an_archive_raises(content):
+    with pytest.raises(ValueError):
+        list(iter_archive_members(io.BytesIO(content)))
+
+
+def test_archive_damaged_before_its_first_member_raises():
+    data = _tar(_resumes(3, size=4096)).getvalue()
+
+    with pytest.raises(ValueError):
+        list(iter_archive_members(io.BytesIO(data[:40])))
@@ -0,0 +1,82 @@
+"""
+Regression tests for the streaming CSV import (candidate_csv.py).
+
+    python -m pytest -q test_candidate_csv.py
+"""
+import io
+
+import pytest
+
+import db_pool
+import db_writer
+import migrations
+from candidate_csv import import_candidates_csv
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "candidates.db")
+    for module in (db_pool, db_writer, migrations):
+        monkeypatch.setattr(module, "DB_PATH", path)
+    migrations.ensure_schema(path)
+    yield path
+    db_writer.close_write_queues()
+    db_pool.close_all()
+
+
+def _stored(path, email):
+    with db_pool.read_connection(path) as conn:
+        return conn.execute(
+            "SELECT name, score, status FROM candidates WHERE email = ?", (email,)
+        ).fetchone()
+
+
+def _import(text, **kwargs):
+    return import_candidates_csv(io.StringIO(text), **kwargs)
+
+
+def test_update_without_score_and_status_columns_keeps_stored_values(db_path):
+    _import("Name,Phone,Email,Score,Status\nA1,1,a@x,80,Interview Scheduled\n")
+
+    counts = _import("Name,Phone,Email\nA2,1,a@x\n")
+
+    assert counts["updated"] == 1
+    assert _stored(db_path, "a@x") == ("A2", 80.0, "Interview Scheduled")
+
+
+def test_update_with_empty_cells_keeps_stored_values(db_path):
+    _import("Name,Phone,Email,Score,Status\nA1,1,a@x,80,Interview Scheduled\n")
+
+    _import("Name,Phone,Email,Score,Status\nA1,1,a@x,,\n")
+
+    assert _stored(db_path, "a@x") == ("A1", 80.0, "Interview Scheduled")
+
+
+def test_update_with_values_overwrites_stored_values(db_path):
+    _import("Name,Phone,Email,Score,Status\nA1,1,a@x,80,Interview Scheduled\n")
+
+    _import("Name,Phone,Email,Score,Status\nA1,1,a@x,0,Rejected\n")
+
+    assert _stored(db_path, "a@x") == ("A1", 0.0, "Rejected")
+
+
+@pytest.mark.parametrize("on_conflict", ["insert", "update", "ignore"])
+def test_new_rows_get_default_score_and_status(db_path, on_conflict):
+    _import("Name,Phone,Email\nB1,2,b@x\n", on_conflict=on_conflict, default_status="Imported")
+
+    assert _stored(db_path, "b@x") == ("B1", 0.0, "Imported")
+
+
+@pytest.mark.parametrize("on_conflict", ["update", "ignore"])
+def test_rows_matching_an_archived_candidate_are_skipped(db_path, on_conflict):
+    from candidate_archive import archive_batch
+
+    _import("Name,Phone,Email,Score,Status\nC1,3,c@x,55,Rejected\nD1,4,d@x,60,Hired\n")
+    db_writer.write(archive_batch, None, ("Rejected", "Hired"))
+
+    counts = _import("Name,Phone,Email\nC2,3,\nD2,,d@x\n", on_conflict=on_conflict)
+
+    assert counts["skipped"] == 2
+    with db_pool.read_connection(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0] == 0
+        assert conn.execute("SELECT name FROM candidates_archive ORDER BY id").fetchall() == [("C1",), ("D1",)]
@@ -0,0 +1,81 @@
+"""
+Regression tests for keyset pagination (candidate_store.query_candidates_page).
+
+    python -m pytest -q test_candidate_pages.py
+"""
+import pytest
+
+import db_pool
+import db_writer
+import migrations
+from candidate_store import insert_candidates, query_candidates_page
+
+# (name, score); NULLs sort lowest, and ties are broken by id
+ROWS = [
+    ("Cara", 70), (None, None), ("Abe", 70), ("Bo", None), (None, 55),
+    ("Abe", None), ("Dee", 90), ("Cara", 55), (None, 70), ("Eli", None),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "candidates.db")
+    for module in (db_pool, db_writer, migrations):
+        monkeypatch.setattr(module, "DB_PATH", path)
+    migrations.ensure_schema(path)
+    db_writer.write(insert_candidates, [
+        (name, "", "", "", "", f"{index}@x", str(index), "", score, "New")
+        for index, (name, score) in enumerate(ROWS)
+    ])
+    yield path
+    db_writer.close_write_queues()
+    db_pool.close_all()
+
+
+def _expected(column, descending):
+    with_ids = [{"id": index + 1, "name": name, "score": score} for index, (name, score) in enumerate(ROWS)]
+    if column == "id":
+        return sorted((row["id"] for row in with_ids), reverse=descending)
+    nulls = sorted((row for row in with_ids if row[column] is None), key=lambda row: row["id"])
+    values = sorted((row for row in with_ids if row[column] is not None), key=lambda row: (row[column], row["id"]))
+    ordered = nulls + values
+    return [row["id"] for row in (reversed(ordered) if descending else ordered)]
+
+
+def _walk(path, sort, limit):
+    ids, cursor = [], None
+    with db_pool.read_connection(path) as conn:
+        while True:
+            page = query_candidates_page(conn, limit=limit, cursor=cursor, fields="name,score", sort=sort)
+            assert len(page["candidates"]) <= limit
+            ids.extend(candidate["id"] for candidate in page["candidates"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "score", "-score", "name", "-name"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_walking_every_page_returns_each_row_once_in_order(db_path, sort, limit):
+    ids = _walk(db_path, sort, limit)
+
+    assert ids == _expected(sort.lstrip("-"), sort.startswith("-"))
+
+
+def test_filters_apply_on_every_page(db_path):
+    ids, cursor = [], None
+    with db_pool.read_connection(db_path) as conn:
+        while True:
+            page = query_candidates_page(conn, limit=1, cursor=cursor, sort="-score", min_score=60)
+            ids.extend(candidate["id"] for candidate in page["candidates"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+    assert ids == [7, 9, 3, 1]
+
+
+def test_bad_cursor_is_rejected(db_path):
+    with db_pool.read_connection(db_path) as conn:
+        with pytest.raises(ValueError):
+            query_candidates_page(conn, cursor="not-a-cursor", sort="score")
@@ -0,0 +1,93 @@
+"""
+Regression tests for grouped commits in the single-writer queue (db_writer.py).
+
+    python -m pytest -q test_db_writer.py
+"""
+import threading
+
+import pytest
+
+import db_pool
+import db_writer
+import migrations
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "candidates.db")
+    for module in (db_pool, db_writer, migrations):
+        monkeypatch.setattr(module, "DB_PATH", path)
+    migrations.ensure_schema(path)
+    yield path
+    db_writer.close_write_queues()
+    db_pool.close_all()
+
+
+def _add(conn, name):
+    conn.execute("INSERT INTO candidates (name, email) VALUES (?, ?)", (name, f"{name}@x"))
+    return name
+
+
+def _add_then_fail(conn, name):
+    _add(conn, name)
+    raise RuntimeError(f"{name} failed")
+
+
+def _names(path):
+    with db_pool.read_connection(path) as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM candidates ORDER BY id")]
+
+
+def _queue_group(writes, jobs):
+    """Hold the writer in a first job so that jobs are queued behind it and run as one group"""
+    started, release = threading.Event(), threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait(5)
+
+    blocker = writes.submit(block)
+    assert started.wait(5)
+    futures = [writes.submit(func, *args) for func, *args in jobs]
+    release.set()
+    blocker.result(5)
+    return futures
+
+
+def test_failed_job_rolls_back_only_its_savepoint(db_path):
+    writes = db_writer.WriteQueue(db_path)
+    try:
+        futures = _queue_group(writes, [(_add, "a"), (_add_then_fail, "b"), (_add, "c")])
+
+        assert futures[0].result(5) == "a"
+        with pytest.raises(RuntimeError, match="b failed"):
+            futures[1].result(5)
+        assert futures[2].result(5) == "c"
+    finally:
+        writes.close()
+
+    assert _names(db_path) == ["a", "c"]
+    # The blocker ran alone; the three queued jobs shared one transaction
+    assert writes.transactions == 2
+    assert writes.jobs_run == 4
+
+
+def test_failed_lone_job_writes_nothing(db_path):
+    writes = db_writer.WriteQueue(db_path)
+    try:
+        with pytest.raises(RuntimeError):
+            writes.write(_add_then_fail, "a")
+        assert writes.write(_add, "b") == "b"
+    finally:
+        writes.close()
+
+    assert _names(db_path) == ["b"]
+
+
+def test_close_runs_queued_jobs(db_path):
+    writes = db_writer.WriteQueue(db_path)
+    futures = _queue_group(writes, [(_add, name) for name in "abc"])
+    writes.close()
+
+    assert [future.result(0) for future in futures] == ["a", "b", "c"]
+    assert _names(db_path) == ["a", "b", "c"]
@@ -0,0 +1,165 @@
+"""
+Content-addressed cache of extracted document text.
+
+The same resume is often uploaded several times (re-applications, scoring
+against several job descriptions, every Streamlit rerun), and extraction is
+the most expensive step after the LLM call. Text is cached under the SHA-256
+of the file bytes, so any copy of the same file hits, whatever its name.
+
+Entries live in a small in-process LRU and in an on-disk store shared by
+every process on the host (the API and the Streamlit apps). Files are
+written to a temporary name and renamed into place, so concurrent writers
+never leave a torn entry. The store keeps its total size under
+EXTRACT_CACHE_MAX_MB by deleting the least recently read files.
+
+Keys include the document kind and EXTRACTOR_VERSION from
+text_extraction.py, so changing how text is extracted never serves text from
+the old extractor.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", "extract_cache")
+# Entries kept in memory per process
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "512"))
+# Size the on-disk store is pruned back to; 0 disables the disk store
+EXTRACT_CACHE_MAX_MB = float(os.getenv("EXTRACT_CACHE_MAX_MB", "512"))
+
+# Files written between two checks of the store's size
+_PRUNE_EVERY = 128
+
+
+def content_digest(content):
+    """SHA-256 hex digest of a document's bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """LRU of extracted text in memory, backed by a directory of text files"""
+
+    def __init__(self, directory=EXTRACT_CACHE_DIR, max_entries=EXTRACT_CACHE_SIZE, max_mb=EXTRACT_CACHE_MAX_MB):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached text for key, or None"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return text
+        if self.max_bytes:
+            path = self._path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                # Reads refresh the mtime that pruning goes by
+                os.utime(path)
+            except OSError:
+                text = None
+            if text is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, text)
+                return text
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        """Store text under key in memory and on disk"""
+        self._remember(key, text)
+        if not self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            # A full or read-only disk only costs a re-extraction later
+            print(f"Could not write extracted text cache entry: {exc}")
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently read files until the store fits in max_bytes"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "directory": self.directory if self.max_bytes else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups * 100, 1) if lookups else 0
+            }
+
+
+text_cache = TextCache()
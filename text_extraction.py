@@ -0,0 +1,366 @@
+"""
+Document text extraction off the event loop.
+
+PDF and Word parsing is pure-Python and CPU-bound, so running it in an
+async handler (or a thread) stalls every other request, Twilio webhooks
+included. Extraction runs in a pool of worker processes instead: documents
+from one batch are parsed in parallel across cores, and each document has
+its own deadline (EXTRACT_TIMEOUT_S). No more documents are submitted than
+there are workers, so the deadline covers only the time a document spends
+being parsed, never time spent queued behind other documents.
+
+Each worker is a long-lived process of its own that takes one document at
+a time. A worker cannot be interrupted mid-document, so a document that runs
+past its deadline, or whose request goes away, is stopped by terminating
+just the worker it runs on; documents on the other workers carry on, and a
+fresh worker is started when one is next needed. A worker imports the
+parsers before it takes its first document, so start-up time never counts
+against a deadline. A document whose worker dies under it (a crash in a C
+parser, the OOM killer) is retried once on a fresh worker.
+
+Extracted text is cached by content hash (text_cache.py), so a file that was
+seen before is answered without touching the pool.
+
+A document is passed either as bytes or as the path of a file on disk (a
+spooled upload, see upload_spool.py); large files go by path so their bytes
+are never pickled across to the worker.
+
+Text is produced lazily, page by page (PDF), paragraph by paragraph (Word,
+see docx_extraction.py) or chunk by chunk (plain text), and extraction stops
+as soon as the caller's character budget is filled. Callers size the budget
+from the prompt that the text goes into (chars_for_tokens), so an oversized
+upload costs neither parse time nor prompt tokens beyond what the prompt can
+use.
+"""
+import asyncio
+import codecs
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from docx_extraction import iter_docx_text
+from pdf_extraction import EXTRACT_MAX_PAGES, iter_pdf_pages
+from text_cache import content_digest, file_digest, text_cache
+
+PDF_TYPES = ("application/pdf",)
+DOCX_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+)
+
+# Bump when extraction output changes, so cached text from the old code is not reused
+EXTRACTOR_VERSION = 5
+
+# Characters kept from a document when the caller gives no budget; 0 keeps everything
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "40000"))
+# Rough characters per prompt token, for turning a token budget into a character budget
+CHARS_PER_TOKEN = 4
+
+_TEXT_CHUNK_SIZE = 64 * 1024
+
+# Worker processes; 0 means one per core
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+# Seconds one document may take before it is cancelled
+EXTRACT_TIMEOUT_S = float(os.getenv("EXTRACT_TIMEOUT_S", "30"))
+# spawn keeps workers clear of the parent's threads and open database handles
+EXTRACT_START_METHOD = os.getenv("EXTRACT_START_METHOD", "spawn")
+
+
+class ExtractionError(ValueError):
+    """The document could not be read"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """The document took longer than its deadline and was cancelled"""
+
+
+def document_kind(content_type):
+    """'pdf', 'docx' or 'text': which extractor handles a content type"""
+    if content_type in PDF_TYPES:
+        return "pdf"
+    if content_type in DOCX_TYPES:
+        return "docx"
+    return "text"
+
+
+def chars_for_tokens(max_tokens):
+    """Character budget for roughly max_tokens prompt tokens"""
+    return max_tokens * CHARS_PER_TOKEN
+
+
+def cache_key(source, content_type, digest=None, max_chars=None):
+    """Text cache key: content hash, document kind, extractor version and limits"""
+    if digest is None:
+        digest = content_digest(source) if isinstance(source, bytes) else file_digest(source)
+    max_chars = EXTRACT_MAX_CHARS if max_chars is None else max_chars
+    return f"{digest}-{document_kind(content_type)}-v{EXTRACTOR_VERSION}-p{EXTRACT_MAX_PAGES}-c{max_chars}"
+
+
+def open_source(source):
+    """Binary file object over a document given as bytes or as a file path"""
+    return io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb")
+
+
+def iter_document_text(f, content_type):
+    """Yield a document's text in pieces as it is parsed: pages, paragraphs or decoded chunks"""
+    if content_type in PDF_TYPES:
+        for page in iter_pdf_pages(f):
+            yield page if page.endswith("\n") else page + "\n"
+    elif content_type in DOCX_TYPES:
+        yield from iter_docx_text(f)
+    else:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        for chunk in iter(lambda: f.read(_TEXT_CHUNK_SIZE), b""):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+
+def take_budget(pieces, max_chars):
+    """Join pieces until max_chars characters (0 for no limit), then stop the generator"""
+    parts, size = [], 0
+    try:
+        for piece in pieces:
+            if max_chars and size + len(piece) >= max_chars:
+                parts.append(piece[:max_chars - size])
+                break
+            parts.append(piece)
+            size += len(piece)
+    finally:
+        # Closing the generator skips the pages that were never asked for
+        close = getattr(pieces, "close", None)
+        if close is not None:
+            close()
+    return "".join(parts)
+
+
+def extract_text(source, content_type, max_chars=None):
+    """
+    Extract plain text from a document (bytes or file path), stopping after
+    max_chars characters (default EXTRACT_MAX_CHARS); runs in a worker process.
+    """
+    max_chars = EXTRACT_MAX_CHARS if max_chars is None else max_chars
+    try:
+        with open_source(source) as f:
+            return take_budget(iter_document_text(f, content_type), max_chars)
+    except Exception as exc:
+        # Re-raised as a plain error type so it pickles back to the parent
+        raise ExtractionError(f"{type(exc).__name__}: {exc}") from None
+
+
+def _extraction_worker(conn):
+    """Worker process: extract each (source, content_type, max_chars) job sent over conn until told to stop"""
+    # Load the parsers before reporting ready, so no document's deadline pays for the imports
+    import lxml.etree  # noqa: F401
+    import pdfminer.high_level  # noqa: F401
+    import pdfminer.layout  # noqa: F401
+    import PyPDF2  # noqa: F401
+
+    conn.send(None)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            result = (True, extract_text(*job))
+        except ExtractionError as exc:
+            result = (False, exc)
+        conn.send(result)
+
+
+class _Worker:
+    """One extraction process and the parent's end of its pipe"""
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_extraction_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        try:
+            # Blocks until the worker has imported the parsers
+            self.conn.recv()
+        except (EOFError, OSError):
+            self._close()
+            raise ExtractionError("Extraction worker failed to start") from None
+
+    def run(self, job):
+        """Send one job and wait for its (ok, text or error); EOFError if the process dies first"""
+        try:
+            self.conn.send(job)
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self._close()
+            raise EOFError("Extraction worker stopped") from None
+
+    def is_alive(self):
+        return not self.conn.closed and self.process.is_alive()
+
+    def kill(self):
+        # The thread blocked in run() sees the pipe close and cleans up
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self._close()
+
+    def _close(self):
+        self.conn.close()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+class ExtractionPool:
+    """Worker processes for extract_text, one document each at a time, with per-document timeouts"""
+
+    def __init__(self, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT_S, start_method=EXTRACT_START_METHOD):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.start_method = start_method
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # Starts workers and waits on their pipes; a killed worker's thread may
+        # still be winding down when its slot is reused, hence the headroom
+        self._threads = ThreadPoolExecutor(2 * self.workers, thread_name_prefix="extraction")
+        # One slot per worker, created on the event loop that uses them
+        self._slots = None
+        self._slots_loop = None
+        # Counters for monitoring
+        self.documents = 0
+        self.timeouts = 0
+        self.recycles = 0
+
+    def _checkout(self):
+        """An idle worker, or a newly started one; blocks while a worker starts"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Extraction pool is closed")
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+        return _Worker(multiprocessing.get_context(self.start_method))
+
+    def _checkin(self, worker):
+        with self._lock:
+            if not self._closed and worker.is_alive():
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def _checkin_started(self, future):
+        # A worker that finished starting after its caller went away goes back to the pool
+        if not future.cancelled() and future.exception() is None:
+            self._checkin(future.result())
+
+    def _kill(self, worker):
+        self.recycles += 1
+        worker.kill()
+
+    def _get_slots(self):
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    async def extract(self, source, content_type, timeout=None, max_chars=None):
+        """Extract a document's text in a worker process; raises ExtractionTimeout past the deadline"""
+        timeout = self.timeout if timeout is None else timeout
+        # Wait for a free worker before submitting, so the deadline starts when the document does
+        async with self._get_slots():
+            return await self._extract(source, content_type, timeout, max_chars)
+
+    async def _extract(self, source, content_type, timeout, max_chars):
+        for attempt in range(2):
+            # Starting a worker is not part of the deadline
+            started = self._threads.submit(self._checkout)
+            try:
+                worker = await asyncio.wrap_future(started)
+            except asyncio.CancelledError:
+                started.add_done_callback(self._checkin_started)
+                raise
+            job = asyncio.wrap_future(self._threads.submit(worker.run, (source, content_type, max_chars)))
+            try:
+                ok, result = await asyncio.wait_for(job, timeout or None)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._kill(worker)
+                raise ExtractionTimeout(f"Extraction took longer than {timeout:g}s") from None
+            except EOFError:
+                # The worker died under this document; give it one more go on a fresh worker
+                self.recycles += 1
+                if attempt:
+                    raise ExtractionError("Extraction worker stopped unexpectedly") from None
+                continue
+            except asyncio.CancelledError:
+                # The request went away; stop its document where it is
+                self._kill(worker)
+                raise
+            self._checkin(worker)
+            if not ok:
+                raise result
+            self.documents += 1
+            return result
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "timeout_s": self.timeout,
+            "documents": self.documents,
+            "timeouts": self.timeouts,
+            "recycles": self.recycles,
+        }
+
+    def close(self):
+        """Stop the idle worker processes; busy ones stop when their document is done"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+extraction_pool = ExtractionPool()
+
+
+def _cached_lookup(source, content_type, digest=None, max_chars=None):
+    key = cache_key(source, content_type, digest, max_chars)
+    return key, text_cache.get(key)
+
+
+def extract_text_cached(source, content_type, digest=None, max_chars=None):
+    """Extract a document's text in this process, reusing cached text for identical files"""
+    key, text = _cached_lookup(source, content_type, digest, max_chars)
+    if text is None:
+        text = extract_text(source, content_type, max_chars)
+        text_cache.put(key, text)
+    return text
+
+
+async def extract_text_async(source, content_type, timeout=None, digest=None, max_chars=None):
+    """
+    Extract a document's text on the process-wide extraction pool, reusing
+    cached text. source is bytes or a file path; pass digest when the content
+    hash is already known (spooled uploads hash while they are written).
+    """
+    # Hashing and the disk lookup run in a thread; hashlib releases the GIL on large inputs
+    key, text = await asyncio.to_thread(_cached_lookup, source, content_type, digest, max_chars)
+    if text is None:
+        text = await extraction_pool.extract(source, content_type, timeout, max_chars)
+        await asyncio.to_thread(text_cache.put, key, text)
+    return text
+
+
+def shutdown_extraction():
+    extraction_pool.close()
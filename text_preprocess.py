@@ -0,0 +1,155 @@
+"""
+Clean-up of extracted document text before it goes into a prompt.
+
+Extracted resumes carry a lot of text the model does not need: runs of
+spaces and blank lines from the layout, page numbers, the header or footer
+that repeats on every page, "References available upon request". Every one
+of those tokens is paid for, in latency and money, on every candidate of a
+bulk upload. prepare_prompt_text():
+
+- collapses whitespace inside lines and runs of blank lines
+- drops page-number lines and stock boilerplate lines
+- keeps only the first copy of a repeated line: any repeated long line
+  (duplicated text boxes, pasted paragraphs) and short lines that repeat
+  like page headers and footers do
+- cuts the result to a token budget, at a line boundary where it can
+
+Tokens are counted with tiktoken's o200k_base encoding (the gpt-4o family)
+once load_tokenizer() has loaded it. tiktoken fetches its encoding file over
+the network on first use, so it is only loaded when TIKTOKEN_CACHE_DIR is set
+(the file is read from there, and downloaded into it once if missing), and
+only by load_tokenizer(): the API calls it in a background thread at
+startup, never inside a request. Until then, or without TIKTOKEN_CACHE_DIR, a
+word-based estimate is used, which errs on the high side so a budget is never
+overrun by much.
+"""
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+TOKENIZER_ENCODING = "o200k_base"
+
+# Short lines ("Software Engineer", "Skills") legitimately recur; they only count as
+# page furniture when they repeat at least this often
+REPEATED_LINE_MIN = 3
+_SHORT_LINE = 40
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r"^(curriculum vitae|resume|résumé|cv|references( are)? available (up)?on request\.?|"
+    r"references:? available (up)?on request\.?|confidential|page intentionally left blank)$",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_loaded = False
+
+
+def load_tokenizer():
+    """
+    Load the tiktoken encoding from TIKTOKEN_CACHE_DIR; blocking, so call it
+    off the event loop. Returns whether token counts will be exact.
+    """
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            if not os.getenv("TIKTOKEN_CACHE_DIR"):
+                print("TIKTOKEN_CACHE_DIR is not set; estimating token counts")
+            else:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as exc:
+                    print(f"tiktoken unavailable ({type(exc).__name__}); estimating token counts")
+            _encoding_loaded = True
+    return _encoding is not None
+
+
+def _estimate_tokens(text):
+    # Roughly one token per short word or punctuation mark, more for long words
+    return sum(math.ceil(len(piece) / 6) for piece in _WORD.findall(text))
+
+
+def count_tokens(text):
+    """Prompt tokens in text"""
+    # Never loads the encoding: counting may run on the event loop, and loading can hit the network
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+
+def normalize_whitespace(text):
+    """Unicode-normalized lines with single spaces and no runs of blank lines"""
+    text = unicodedata.normalize("NFKC", _CONTROL.sub("\n", text))
+    lines = []
+    for line in text.splitlines():
+        line = _SPACES.sub(" ", line).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def strip_noise(lines):
+    """Drop page numbers, boilerplate lines and repeats of headers, footers and long lines"""
+    counts = Counter(line.casefold() for line in lines if line)
+    seen = set()
+    kept = []
+    for line in lines:
+        if not line:
+            if kept and kept[-1]:
+                kept.append(line)
+            continue
+        if _PAGE_NUMBER.match(line) or _BOILERPLATE.match(line):
+            continue
+        key = line.casefold()
+        if key in seen and (len(line) >= _SHORT_LINE or counts[key] >= REPEATED_LINE_MIN):
+            continue
+        seen.add(key)
+        kept.append(line)
+    while kept and not kept[-1]:
+        kept.pop()
+    return kept
+
+
+def truncate_to_tokens(lines, max_tokens):
+    """Keep lines until max_tokens is reached; the last line is cut by words if needed"""
+    kept = []
+    used = 0
+    for line in lines:
+        # +1 for the newline joining it to the previous line
+        cost = count_tokens(line) + 1
+        if used + cost <= max_tokens:
+            kept.append(line)
+            used += cost
+            continue
+        words = line.split(" ")
+        # Binary search for the longest word prefix that still fits
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if used + count_tokens(" ".join(words[:middle])) + 1 <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        if low:
+            kept.append(" ".join(words[:low]))
+        break
+    return kept
+
+
+def prepare_prompt_text(text, max_tokens=None):
+    """Normalized, de-duplicated document text, cut to max_tokens prompt tokens when given"""
+    lines = strip_noise(normalize_whitespace(text or ""))
+    if max_tokens:
+        lines = truncate_to_tokens(lines, max_tokens)
+    return "\n".join(lines).strip()
@@ -0,0 +1,99 @@
+"""
+Spooled uploads for the parse endpoints.
+
+An upload is copied out of the request in chunks and hashed on the way.
+Small files stay in memory as bytes. Anything above UPLOAD_SPOOL_THRESHOLD_KB
+goes to a named temporary file, and extraction reads it from there: the
+worker process opens the path itself, so the bytes are never held in the
+API process or pickled across to the pool.
+
+Batch endpoints spool and extract at most UPLOAD_WINDOW files at a time and
+release each one (the temporary file and the request's own copy) as soon as
+its text is out, so peak memory depends on the window, not on the batch.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from text_extraction import EXTRACT_WORKERS
+
+UPLOAD_SPOOL_THRESHOLD_KB = int(os.getenv("UPLOAD_SPOOL_THRESHOLD_KB", "1024"))
+# Directory for spooled uploads; unset uses the system temp directory
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+# Files of one batch spooled and extracted at the same time; defaults to one per extraction worker
+UPLOAD_WINDOW = int(os.getenv("UPLOAD_WINDOW", "0")) or EXTRACT_WORKERS
+
+_CHUNK_SIZE = 256 * 1024
+
+
+class SpooledUpload:
+    """An uploaded document held as bytes (small) or as a temporary file (large)"""
+
+    def __init__(self, filename, content_type, content=None, path=None, size=0, digest=None):
+        self.filename = filename
+        self.content_type = content_type
+        self.content = content
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    @property
+    def source(self):
+        """What text_extraction takes: the bytes, or the temporary file's path"""
+        return self.content if self.content is not None else self.path
+
+    def close(self):
+        """Drop the bytes or delete the temporary file"""
+        self.content = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spool_file(fileobj, filename=None, content_type=None, threshold_kb=UPLOAD_SPOOL_THRESHOLD_KB):
+    """Copy a binary file object into a SpooledUpload, hashing it on the way"""
+    threshold = threshold_kb * 1024
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    size = 0
+    spool = None
+    try:
+        for chunk in iter(lambda: fileobj.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            if spool is None:
+                buffer += chunk
+                if len(buffer) > threshold:
+                    # Over the threshold: move what we have so far to disk and keep going there
+                    spool = tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_SPOOL_DIR, delete=False)
+                    spool.write(buffer)
+                    buffer = None
+            else:
+                spool.write(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.remove(spool.name)
+        raise
+    if spool is None:
+        return SpooledUpload(filename, content_type, content=bytes(buffer), size=size, digest=digest.hexdigest())
+    spool.close()
+    return SpooledUpload(filename, content_type, path=spool.name, size=size, digest=digest.hexdigest())
+
+
+async def spool_upload(upload, threshold_kb=UPLOAD_SPOOL_THRESHOLD_KB):
+    """Spool a FastAPI UploadFile off the event loop, then release the request's copy"""
+    try:
+        return await asyncio.to_thread(spool_file, upload.file, upload.filename, upload.content_type, threshold_kb)
+    finally:
+        await upload.close()